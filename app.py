@@ -1,26 +1,63 @@
 import streamlit as st
-from litellm import completion
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from io import BytesIO
+import uuid
 from pathlib import Path
-import re
-import zipfile
-import requests
-from PIL import Image
-
-domainsduck_key = st.secrets["DOMAINDUCK_API_KEY"]
-
-# Load CSS from external file
+from artifacts import (
+    PREVIEW_MAX_BYTES,
+    parse_website_code,
+    pitch_pdf_bytes,
+    preview_payload,
+    website_export_sizes,
+    website_zip_bytes,
+)
+from pipeline import (
+    agent_metrics,
+    asset_key,
+    finish_generation,
+    get_secret,
+    idea_index,
+    parse_names,
+    response_cache,
+    run_agent,
+    run_name_generation,
+)
+from domains import check_domains, domain_candidates
+from jobs import ACTIVE_STATUSES, JobQueue, start_worker_thread
+from service import PREFETCH_TOKEN_BUDGET, GenerationService, Prefetch
+from website_code import FencedBlockParser
+
+# One worker pool and result store per server process, shared by every
+# session, so concurrent users don't each add their own threads and calls.
+@st.cache_resource
+def generation_service():
+    return GenerationService()
+
+service = generation_service()
+
+# Background jobs outlive page reloads. Unless JOB_WORKER=external (a
+# separate `python jobs.py` process), a worker thread of this server runs them.
+@st.cache_resource
+def job_queue():
+    queue = JobQueue()
+    if get_secret("JOB_WORKER", "thread") != "external":
+        start_worker_thread(queue, executor=service.pool)
+    return queue
+
+jobs = job_queue()
+
+# Load CSS from external file; it is read from disk once per process.
 css_path = Path(__file__).parent / "style.css"
-def local_css(file_path):
+@st.cache_resource
+def read_css(file_path):
     try:
         with open(file_path) as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+            return f.read()
     except Exception:
-        pass  # ignore if no CSS file
+        return None  # ignore if no CSS file
+
+def local_css(file_path):
+    css = read_css(file_path)
+    if css:
+        st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
 
 local_css(css_path)
 
@@ -34,41 +71,7 @@ Enter your startup idea, select tone, and toggle which assets to generate.
 """
 )
 
-def create_pitch_pdf(pitch_text, startup_name):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
-
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Justify', alignment=4, fontSize=12, leading=16))  # 4 = TA_JUSTIFY
-
-    flowables = []
-    flowables.append(Paragraph(f"{startup_name} - Elevator Pitch", styles['Title']))
-    flowables.append(Spacer(1, 12))
-
-    for para in pitch_text.split('\n\n'):
-        flowables.append(Paragraph(para.strip(), styles['Justify']))
-        flowables.append(Spacer(1, 12))
-
-    doc.build(flowables)
-    buffer.seek(0)
-    return buffer
-
-
 # --- Domain availability check ---
-def check_domain_availability(domain: str) -> str:
-    url = "https://us.domainsduck.com/api/get/"
-    params = {
-        "domain": domain,
-        "apikey": domainsduck_key,
-    }
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return data.get("availability", "unknown")
-    except Exception as e:
-        return f"error: {str(e)}"
-
 def map_domain_status(status):
     status = status.upper()
     if status == "TRUE":
@@ -91,297 +94,141 @@ def clean_markdown(text):
         text = text.replace(old, new)
     return text.strip()
 
-def run_completion(prompt: str):
-    response = completion(
-        model="groq/llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        api_key=st.secrets["GROQ_API_KEY"],
+# --- Result rendering ---
+ASSET_TABS = ["Tagline", "Pitch", "Audience", "Brand", "Competitor", "Financials", "Social Media", "Website Preview", "Website Code"]
+# Result key -> (index into ASSET_TABS, section heading)
+ASSET_SECTIONS = {
+    "tagline": (0, "Tagline"),
+    "pitch": (1, "Elevator Pitch"),
+    "audience": (2, "Target Audience & Pain Points"),
+    "brand": (3, "Brand Direction"),
+    "competitor": (4, "Competitor Analysis"),
+    "financials": (5, "Financial Projections"),
+    "social_media": (6, "Social Media Post Ideas"),
+    "website": (8, "Website Code"),
+}
+WEBSITE_PREVIEW_TAB = 7
+
+def render_text_asset(key, text, startup_name):
+    st.markdown(f"### {ASSET_SECTIONS[key][1]}\n{text}")
+
+    if key == "pitch" and text:
+        # Built on the first click and cached by content after that.
+        st.download_button(
+            label="Download Pitch as PDF",
+            data=lambda: pitch_pdf_bytes(text, startup_name),
+            file_name=f"{startup_name.replace(' ', '_')}_pitch.pdf",
+            mime="application/pdf"
+        )
+
+def render_website_preview(website_code):
+    show_website_preview(*parse_website_code(website_code))
+
+def show_website_preview(html_code, css_code, js_code):
+    st.markdown("### Live Website Preview")
+    document = preview_payload(html_code, css_code, js_code)
+    if document is None:
+        st.info(f"This page is larger than {PREVIEW_MAX_BYTES // 1024} KB, so it is only available as a download.")
+    else:
+        st.components.v1.html(document, height=600, scrolling=True)
+
+def render_website_code(website_code, startup_name):
+    html_code, css_code, js_code = parse_website_code(website_code)
+    st.markdown("### Website Code")
+    st.subheader("HTML")
+    st.code(html_code, language="html")
+    st.subheader("CSS")
+    st.code(css_code, language="css")
+    st.subheader("JavaScript")
+    st.code(js_code, language="javascript")
+
+    minify = st.checkbox("Minify downloaded files", value=False, key="minify_website")
+    st.download_button(
+        label="Download Website Files (ZIP)",
+        data=lambda: website_zip_bytes(html_code, css_code, js_code, minify=minify),
+        file_name=f"{startup_name.replace(' ','_')}_website.zip",
+        mime="application/zip"
     )
-    return response["choices"][0]["message"]["content"].strip()
-
-# --- Agents ---
-def idea_agent(idea):
-    prompt = f"""
-You are a seasoned startup strategist.
-
-Analyze this startup idea carefully.
-
-Provide a concise summary (2-3 sentences) that clearly identifies:
-- The main problem the startup addresses
-- The core solution it offers
-
-Make the summary compelling and insightful.
-
-Startup Idea:
-{idea}
-
-Output only the summary text without any additional explanation.
-"""
-    return run_completion(prompt)
-
-def name_agent(idea):
-    prompt = f"""
-Generate exactly 3 unique startup names as a numbered list ONLY.
-
-Do NOT include any explanations, descriptions, or pronunciation guides.
-
-Avoid generic words like "AI" and "Tech". The names should be easy to pronounce and SEO Friendly.
-
-Startup idea:
-{idea}
-
-Output only the names as a numbered list.
-"""
-    return run_completion(prompt)
-
-def tagline_agent(name, idea, tone):
-    prompt = f"""
-You are an expert copywriter.
-
-Create a catchy and memorable tagline for the startup named "{name}".
-
-The startup idea is:
-{idea}
-
-Use the tone: {tone} (e.g., Formal, Casual, Fun, Investor).
-
-Keep it short (under 10 words).
-
-Output only the tagline text without any explanations or extra text.
-"""
-    return run_completion(prompt)
-
-def pitch_agent(name, idea, tone):
-    prompt = f"""
-You are a skilled marketer.
-
-Write a compelling two-paragraph elevator pitch for the startup named "{name}".
-
-Include:
-- A clear statement of the problem and its impact
-- A description of the solution and unique value proposition
-
-The startup idea is:
-{idea}
-
-Use the tone: {tone}.
-
-Output only the pitch text without any explanations or extra text.
-"""
-    return run_completion(prompt)
-
-def audience_agent(name, idea):
-    prompt = f"""
-You are a market analyst.
-
-Define the target audience and their pain points for the startup named "{name}".
-
-The startup idea is:
-{idea}
-
-Format your answer as bullet points grouped under:
-- Primary Target Audience
-- Secondary Target Audience
-- Pain Points
-
-Use clear and concise language.
-
-Output only the bullet points without explanations or additional text.
-"""
-    return run_completion(prompt)
-
-def brand_agent(name, idea, tone):
-    prompt = f"""
-You are a branding expert.
-
-Suggest a professional color palette (with hex codes) and a simple but effective logo concept idea for the startup named "{name}".
-
-The startup idea is:
-{idea}
-
-Consider the tone: {tone}.
-
-Describe:
-- Primary and secondary colors
-- Logo style and symbolism
-
-Output only the paragraphs describing the color palette and logo concept without explanations or extra text.
-"""
-    return run_completion(prompt)
-
-def website_agent(name, idea, tone):
-    prompt = f"""
-You are a professional front-end web developer and UI/UX designer.
-
-Generate a modern, fully responsive, visually appealing single-page website for the startup named "{name}".
-
-The startup idea is:
-{idea}
-
-Requirements:
-- Provide three separate code blocks for HTML, CSS, and JavaScript.
-- Use clean, semantic HTML5 markup with proper ARIA attributes and alt text for accessibility.
-- Use Google Fonts: 'Poppins' for headings and 'Roboto' for body text, loaded in the HTML head.
-- The CSS should include detailed styling for:
-  - Responsive layout with CSS Grid and Flexbox
-  - Sticky header with smooth background color transition on scroll
-  - Smooth fade-in animations on scroll for sections
-  - Buttons with rounded corners, subtle shadows, hover and focus states
-  - Consistent spacing, readable font sizes, and a clear visual hierarchy
-  - Should have centralized justified layout    
-- JavaScript should handle:
-  - Smooth scrolling navigation for internal links
-  - Simple client-side form validation with inline error messages for the contact form (validate required fields and email format)
-  - Add subtle animations or transitions triggered on scroll
-- The name of CSS file should be style.css in the HTML code
-- The name of CSS file should be script.js in the HTML code
-- The page structure must include these sections:
-
-  1. Hero section:
-     - Large heading with the startup name
-     - Tagline in a smaller font
-     - Centered call-to-action button
-
-  2. About section:
-     - Clear description of the problem the startup solves
-
-  3. Features section:
-     - At least 3 feature cards, each with an icon (emoji or inline SVG), title, and short description
-
-  4. Services section:
-     - At least 4 Services each with an icon (emoji or inline SVG), title, and short description
-
-  5. Testimonials section:
-     - 3 testimonials with user names, photos (use placeholder images), and quotes
-
-  6. Contact section:
-     - Contact form with Name, Email, Message fields
-     - All inputs required with proper validation
-     - Submit button with hover effect
-
-- Include SEO-friendly meta tags (title, description) reflecting the startup name and tone.
-- Ensure the website is accessible, mobile-friendly, and visually balanced.
-- Use only vanilla CSS and JavaScript (no external CSS frameworks or libraries).
-- Website should be detailed and completed and outstanding with animations and all.
-Output your response in three separate labeled code blocks:
-
-1) HTML code  
-2) CSS code  
-3) JavaScript code  
-
-Do NOT include explanations or any text outside the code blocks.
-"""
-    return run_completion(prompt)
-
-def social_media_agent(name, idea, tone):
-    prompt = f"""
-You are a social media strategist.
-
-Create a list of 5 creative social media post ideas for the startup named "{name}".
-
-The startup idea is:
-{idea}
-
-Use a {tone} tone.
-
-Each idea should be short, engaging, and suitable for platforms like Twitter or Instagram.
-
-Output only a numbered list without explanations or additional text.
-"""
-    return run_completion(prompt)
-
-def competitor_analysis_agent(name, idea):
-    prompt = f"""
-You are a business analyst.
-
-Provide a brief competitor analysis for the startup named "{name}".
-
-The startup idea is:
-{idea}
-
-Include:
-- Key competitors
-- What differentiates this startup from competitors
-- Potential market challenges
-
-Write in clear, concise paragraphs.
-
-Output only the analysis text without explanations or extra text.
-"""
-    return run_completion(prompt)
-
-def financials_agent(name, idea):
-    prompt = f"""
-You are a financial advisor.
-
-Create a simple 3-year financial projection outline for the startup named "{name}".
-
-The startup idea is:
-{idea}
-
-Include expected:
-- Revenue streams
-- Key costs
-- Profit estimates
-
-Write in bullet points, clear and concise.
-
-Output only the financial outline without explanations or extra text.
-"""
-    return run_completion(prompt)
+    # Shown once the ZIP has been downloaded; rendering never builds it.
+    sizes = website_export_sizes(html_code, css_code, js_code, minify=minify)
+    if sizes is not None:
+        st.caption(
+            f"ZIP: {sizes['zip_bytes'] / 1024:.1f} KB from {sizes['source_bytes'] / 1024:.1f} KB of code "
+            f"({1 - sizes['zip_bytes'] / max(1, sizes['source_bytes']):.0%} smaller)"
+        )
+
+def generate_asset_here(key, idea_summary, startup_name, tone, stream):
+    """Generate one asset inside the current container, streaming it if asked."""
+    try:
+        if not stream:
+            with st.spinner(f"Generating {ASSET_SECTIONS[key][1]}..."):
+                return run_agent(key, idea_summary, startup_name, tone)
+        slot = st.empty()
+        text = ""
+        for chunk in run_agent(key, idea_summary, startup_name, tone, stream=True):
+            text += chunk
+            if key == "website":
+                slot.code(text)
+            else:
+                slot.markdown(f"### {ASSET_SECTIONS[key][1]}\n{text}")
+        slot.empty()
+        return text.strip()
+    except Exception as e:
+        return f"error: {str(e)}"
 
-# --- Report generator ---
-def report_agent(name, tagline, pitch, audience, brand, idea_summary):
-    if "." in pitch:
-        problem = pitch.split(".", 1)[0] + "."
-        solution = pitch.split(".", 1)[1].strip()
-    else:
-        problem = pitch
-        solution = ""
-    return {
-        "name": name,
-        "tagline": tagline,
-        "pitch": pitch,
-        "audience": audience,
-        "problem": problem,
-        "solution": solution,
-        "brand": brand,
-        "idea_summary": idea_summary,
-    }
-
-# --- Workflow split into parts ---
-def run_name_generation(idea):
-    idea_summary = idea_agent(idea)
-    names = name_agent(idea_summary)
-    return idea_summary, names
-
-def run_full_generation(idea_summary, selected_name, tone, generate_flags):
-    results = {}
-    if generate_flags.get("tagline", False):
-        results['tagline'] = tagline_agent(selected_name, idea_summary, tone)
-    if generate_flags.get("pitch", False):
-        results['pitch'] = pitch_agent(selected_name, idea_summary, tone)
-    if generate_flags.get("audience", False):
-        results['audience'] = audience_agent(selected_name, idea_summary)
-    if generate_flags.get("brand", False):
-        results['brand'] = brand_agent(selected_name, idea_summary, tone)
-    if generate_flags.get("website", False):
-        results['website'] = website_agent(selected_name, idea_summary, tone)
-    if generate_flags.get("social_media", False):
-        results['social_media'] = social_media_agent(selected_name, idea_summary, tone)
-    if generate_flags.get("competitor", False):
-        results['competitor'] = competitor_analysis_agent(selected_name, idea_summary)
-    if generate_flags.get("financials", False):
-        results['financials'] = financials_agent(selected_name, idea_summary)
-    results.update(report_agent(
-        selected_name,
-        results.get('tagline', ''),
-        results.get('pitch', ''),
-        results.get('audience', ''),
-        results.get('brand', ''),
-        idea_summary,
-    ))
-    return results
+def stored_asset(key, idea_summary, startup_name, tone):
+    """Look an asset up in this session's results, then in the shared store."""
+    memo_key = asset_key(key, idea_summary, startup_name, tone)
+    text = st.session_state['assets'].get(memo_key)
+    if text is None:
+        text = service.results.get(memo_key)
+        if text is not None:
+            st.session_state['assets'][memo_key] = text
+    return text
+
+def store_asset(key, idea_summary, startup_name, tone, text):
+    if not text or text.startswith("error:"):
+        return  # let the next request retry failed agents
+    memo_key = asset_key(key, idea_summary, startup_name, tone)
+    st.session_state['assets'][memo_key] = text
+    service.results.set(memo_key, text)
+
+@st.fragment(run_every=2)
+def show_job_progress(job_id):
+    """Poll a background job, showing per-asset progress until it finishes."""
+    job = jobs.get(job_id)
+    if job is None or job['status'] not in ACTIVE_STATUSES:
+        st.rerun()
+    assets = job['assets']
+    finished = sum(asset['status'] in ("done", "failed") for asset in assets.values())
+    st.progress(
+        finished / max(1, len(assets)),
+        text=f"Background job `{job_id}` {job['status']}: {finished}/{len(assets)} assets ready"
+    )
+    st.caption(f"This keeps running if the page reloads. Reopen it later with `?job={job_id}`.")
+    for key, asset in assets.items():
+        heading = ASSET_SECTIONS[key][1]
+        if asset['status'] == "running" and asset['text']:
+            with st.expander(f"{heading}: writing...", expanded=False):
+                st.markdown(asset['text'])
+        else:
+            st.markdown(f"- {heading}: {asset['status']}")
+
+def collect_job(generation, idea_summary, startup_name):
+    """Move a finished background job's assets into the session and shared store."""
+    job = jobs.get(generation['job'])
+    if job is None:
+        st.warning("That background job is no longer available. Please generate again.")
+        st.session_state['generation'] = None
+        return
+    failed = {}
+    for key, asset in job['assets'].items():
+        if asset['status'] == "done":
+            store_asset(key, idea_summary, startup_name, generation['tone'], asset['text'])
+        else:
+            failed[key] = asset['text'] if asset['text'].startswith("error:") else f"error: {job['error'] or 'not generated'}"
+    generation['failed'] = failed
+    del generation['job']
 
 # --- Streamlit UI ---
 
@@ -393,11 +240,39 @@ if 'idea_summary' not in st.session_state:
     st.session_state['idea_summary'] = None
 if 'last_idea' not in st.session_state:
     st.session_state['last_idea'] = ""
+# Similar ideas are only offered back to the session that submitted them.
+if 'session_id' not in st.session_state:
+    st.session_state['session_id'] = uuid.uuid4().hex
 if 'submitted' not in st.session_state:
     st.session_state['submitted'] = False
+if 'generation' not in st.session_state:
+    st.session_state['generation'] = None
+if 'assets' not in st.session_state:
+    st.session_state['assets'] = {}
+if 'similar_match' not in st.session_state:
+    st.session_state['similar_match'] = None
+if 'prefetch' not in st.session_state:
+    st.session_state['prefetch'] = None
+
+# A background job id in the URL restores its results after a reload.
+if not st.session_state['submitted'] and "job" in st.query_params:
+    restored_job = jobs.get(st.query_params["job"])
+    if restored_job is not None:
+        request = restored_job['request']
+        st.session_state['submitted'] = True
+        st.session_state['idea_summary'] = request['idea_summary']
+        st.session_state['finalized_name'] = request['name']
+        st.session_state['generation'] = {
+            "tone": request['tone'],
+            "flags": {key: key in request['assets'] for key in ASSET_SECTIONS},
+            "lazy": False,
+            "job": restored_job['id'],
+        }
 
 idea = st.text_area("Enter your startup idea", placeholder="e.g. An app that connects students with mentors.")
 tone = st.selectbox("Select tone", ["Formal", "Casual", "Fun", "Investor"])
+reuse_similar = st.checkbox("Offer results from my near-identical earlier ideas", value=True)
+prefetch_assets = st.checkbox("Prepare tagline and pitch while I choose a name", value=PREFETCH_TOKEN_BUDGET > 0)
 
 # Reset session states if idea changed
 if st.session_state['last_idea'] != idea:
@@ -406,6 +281,23 @@ if st.session_state['last_idea'] != idea:
     st.session_state['names_generated'] = []
     st.session_state['finalized_name'] = None
     st.session_state['idea_summary'] = None
+    st.session_state['generation'] = None
+    st.session_state['assets'] = {}
+    st.session_state['similar_match'] = None
+    st.session_state['prefetch'] = None
+    st.query_params.pop("job", None)
+
+def accept_names(idea_summary, names_text):
+    st.session_state['submitted'] = True
+    st.session_state['names_generated'] = parse_names(names_text)
+    st.session_state['idea_summary'] = idea_summary
+    st.session_state['prefetch'] = None
+    if prefetch_assets and st.session_state['names_generated']:
+        # The first name is the likeliest pick, so it gets the budget first.
+        prefetch = Prefetch(service, idea_summary, tone)
+        for name in st.session_state['names_generated']:
+            prefetch.submit(name)
+        st.session_state['prefetch'] = prefetch
 
 submitted = st.button("Submit")
 
@@ -413,18 +305,34 @@ if submitted:
     if not idea.strip():
         st.warning("Please enter your startup idea before submitting.")
     else:
-        st.session_state['submitted'] = True
+        match = idea_index.lookup(idea, owner=st.session_state['session_id']) if reuse_similar else None
+        if match is not None:
+            st.session_state['similar_match'] = match
+        else:
+            with st.spinner("Generating startup names..."):
+                accept_names(*run_name_generation(idea, owner=st.session_state['session_id']))
+        st.rerun()
+
+# A near-duplicate of an earlier idea: offer its summary and names first.
+similar_match = st.session_state['similar_match']
+if similar_match is not None and not st.session_state['submitted']:
+    # Only this session's earlier ideas match; a high score can still be a
+    # different idea ("tutors" for "mentors"), so the user decides.
+    similar_summary, similar_names = similar_match.value
+    st.info(
+        f"You analysed a very similar idea earlier ({similar_match.score:.0%} match). "
+        f"Its summary:\n\n> {similar_summary}\n\n"
+        f"Its names: {', '.join(parse_names(similar_names))}"
+    )
+    reuse_col, fresh_col = st.columns(2)
+    if reuse_col.button("Reuse its summary and names"):
+        st.session_state['similar_match'] = None
+        accept_names(*similar_match.value)
+        st.rerun()
+    if fresh_col.button("Generate fresh names"):
+        st.session_state['similar_match'] = None
         with st.spinner("Generating startup names..."):
-            idea_summary, names_text = run_name_generation(idea)
-            name_options = []
-            for line in names_text.split('\n'):
-                line = line.strip()
-                if line and len(line) > 2 and line[0].isdigit() and line[1] == '.':
-                    name = line.split('.', 1)[1].strip()
-                    name_options.append(name)
-
-            st.session_state['names_generated'] = name_options
-            st.session_state['idea_summary'] = idea_summary
+            accept_names(*run_name_generation(idea, owner=st.session_state['session_id']))
         st.rerun()
 
 if st.session_state['submitted']:
@@ -442,18 +350,24 @@ if st.session_state['submitted']:
 
         final_name = custom_name.strip() if custom_name.strip() else selected_name
         
+        prefetch = st.session_state['prefetch']
+        if final_name and prefetch is not None:
+            prefetch.focus(final_name)
+
         if final_name and len(final_name) > 0:
-            domain_to_check = final_name.lower().replace(" ", "") + ".com"
-            raw_availability = check_domain_availability(domain_to_check)
-            availability = map_domain_status(raw_availability)
-            st.markdown(f"**Domain check for `{domain_to_check}`:** **{availability}**")
+            # One parallel batch covers every candidate, so switching between
+            # the generated names is answered from the domain cache.
+            domain_status = check_domains(name_options + [final_name], st.secrets["DOMAINDUCK_API_KEY"])
+            st.markdown(f"**Domain check for {final_name}:**")
+            for domain in domain_candidates(final_name):
+                st.markdown(f"- `{domain}`: **{map_domain_status(domain_status[domain])}**")
         else:
             st.warning("Please select or enter a valid startup name.")
-            domain_to_check = None
-            availability = None
 
         if st.button("Finalize Name"):
             st.session_state['finalized_name'] = final_name
+            if prefetch is not None:
+                prefetch.cancel_others(final_name)
             st.rerun()
     else:
         st.markdown(f"**Finalized Startup Name:** {st.session_state['finalized_name']}")
@@ -467,149 +381,222 @@ if st.session_state['submitted']:
         generate_social_media = st.checkbox("Generate Social Media Post Ideas", value=False)
         generate_competitor = st.checkbox("Generate Competitor Analysis", value=False)
         generate_financials = st.checkbox("Generate Financial Projections", value=False)
+        stream_output = st.checkbox("Show results as they are written", value=True)
+        combined_output = st.checkbox("Request short assets together in one call", value=True)
+        lazy_output = st.checkbox("Only generate an asset when its tab is opened", value=False)
+        background_output = st.checkbox("Run in the background (keeps going if the page reloads)", value=False)
+
+        generate_flags = {
+            "tagline": generate_tagline,
+            "pitch": generate_pitch,
+            "audience": generate_audience,
+            "brand": generate_brand,
+            "website": generate_website,
+            "social_media": generate_social_media,
+            "competitor": generate_competitor,
+            "financials": generate_financials,
+        }
+        startup_name = st.session_state['finalized_name']
 
         if st.button("Generate Selected Assets"):
-            generate_flags = {
-                "tagline": generate_tagline,
-                "pitch": generate_pitch,
-                "audience": generate_audience,
-                "brand": generate_brand,
-                "website": generate_website,
-                "social_media": generate_social_media,
-                "competitor": generate_competitor,
-                "financials": generate_financials,
+            # Remember what was asked for, so reruns (downloads, tab switches,
+            # other widgets) keep showing these results without new LLM calls.
+            st.session_state['generation'] = {
+                "tone": tone,
+                "flags": generate_flags,
+                "lazy": lazy_output,
+                "new": True,
             }
-            with st.spinner("Generating your startup assets..."):
-                # Use existing idea summary (don't re-run idea_agent with name only)
-                result = run_full_generation(
-                    idea_summary,
-                    st.session_state['finalized_name'],
-                    tone,
-                    generate_flags
+            if background_output and not lazy_output:
+                generation = st.session_state['generation']
+                generation['job'] = jobs.submit(idea_summary, startup_name, tone, generate_flags,
+                                                combined=combined_output)
+                del generation['new']
+                st.query_params["job"] = generation['job']
+
+        generation = st.session_state['generation']
+        if generation and generation.get('job'):
+            job = jobs.get(generation['job'])
+            if job is not None and job['status'] in ACTIVE_STATUSES:
+                show_job_progress(generation['job'])
+            else:
+                collect_job(generation, idea_summary, startup_name)
+
+        generation = st.session_state['generation']
+        if generation and not generation['lazy'] and not generation.get('job'):
+            gen_tone = generation['tone']
+            gen_flags = generation['flags']
+            status = st.empty()
+            tabs = st.tabs(ASSET_TABS)
+            slots = {key: tabs[index].empty() for key, (index, _) in ASSET_SECTIONS.items() if gen_flags[key]}
+            preview_slot = tabs[WEBSITE_PREVIEW_TAB].empty()
+
+            # Prefetched assets are found here; a prefetch still running is
+            # joined by the generation below through pipeline.inflight.
+            result = {}
+            missing_flags = {}
+            for key in slots:
+                text = stored_asset(key, idea_summary, startup_name, gen_tone)
+                if text is None:
+                    missing_flags[key] = True
+                else:
+                    result[key] = text
+
+            # Only assets whose inputs changed are generated, and only when the
+            # button was pressed; failures are kept until the next request.
+            new_request = generation.pop("new", False)
+            if missing_flags and new_request:
+                reused = len(slots) - len(missing_flags)
+                status.info(
+                    "Generating your startup assets..."
+                    + (f" (reusing {reused} unchanged)" if reused else "")
                 )
-
-            st.success("Generation Complete!")
-
-            tabs = st.tabs(["Tagline", "Pitch", "Audience", "Brand", "Competitor", "Financials", "Social Media", "Website Preview", "Website Code"])
-
-            if generate_tagline:
-                with tabs[0]:
-                    st.markdown(f"### Tagline\n{result.get('tagline','')}")
-
-            if generate_pitch:
-                with tabs[1]:
-                    pitch_text = result.get('pitch', '')
-                    st.markdown(f"### Elevator Pitch\n{pitch_text}")
-            
-                    if pitch_text:
-                        pdf_buffer = create_pitch_pdf(pitch_text, st.session_state['finalized_name'])
-                        st.download_button(
-                            label="Download Pitch as PDF",
-                            data=pdf_buffer,
-                            file_name=f"{st.session_state['finalized_name'].replace(' ', '_')}_pitch.pdf",
-                            mime="application/pdf"
-                        )
-
-
-            if generate_audience:
-                with tabs[2]:
-                    st.markdown(f"### Target Audience & Pain Points\n{result.get('audience','')}")
-
-            if generate_brand:
-                with tabs[3]:
-                    st.markdown(f"### Brand Direction\n{result.get('brand','')}")
-
-            if generate_competitor:
-                with tabs[4]:
-                    st.markdown(f"### Competitor Analysis\n{result.get('competitor','')}")
-
-            if generate_financials:
-                with tabs[5]:
-                    st.markdown(f"### Financial Projections\n{result.get('financials','')}")
-
-            if generate_social_media:
-                with tabs[6]:
-                    st.markdown(f"### Social Media Post Ideas\n{result.get('social_media','')}")
+                if stream_output:
+                    # The preview starts as soon as the HTML block has closed and
+                    # is refreshed as the CSS and JS blocks complete.
+                    website_parser = FencedBlockParser()
+                    # Use existing idea summary (don't re-run idea_agent with name only)
+                    for key, text, done in service.stream_full_generation(
+                        idea_summary,
+                        startup_name,
+                        gen_tone,
+                        missing_flags,
+                        combined=combined_output
+                    ):
+                        previous = result.get(key, '')
+                        result[key] = text
+                        if key == "website":
+                            slots[key].code(text)
+                            closed = website_parser.feed(text[len(previous):] if text.startswith(previous) else '')
+                            if done:
+                                closed += website_parser.close()
+                            if closed and website_parser.parts['html']:
+                                with preview_slot.container():
+                                    show_website_preview(*website_parser.result())
+                        else:
+                            slots[key].markdown(f"### {ASSET_SECTIONS[key][1]}\n{text}")
+                else:
+                    with st.spinner("Generating..."):
+                        # Use existing idea summary (don't re-run idea_agent with name only)
+                        result.update(service.run_full_generation(
+                            idea_summary,
+                            startup_name,
+                            gen_tone,
+                            missing_flags,
+                            combined=combined_output
+                        ))
+                for key in missing_flags:
+                    store_asset(key, idea_summary, startup_name, gen_tone, result.get(key, ''))
+                generation['failed'] = {key: result.get(key, '') for key in missing_flags}
+                status.success("Generation Complete!")
+            else:
+                result.update({key: generation.get('failed', {}).get(key, '') for key in missing_flags})
+            result = finish_generation(result, idea_summary, startup_name)
+
+            for key, slot in slots.items():
+                with slot.container():
+                    if key == "website":
+                        render_website_code(result.get('website', ''), startup_name)
+                    else:
+                        render_text_asset(key, result.get(key, ''), startup_name)
 
             # Website preview tab with iframe
-            if generate_website:
-                html_code = css_code = js_code = ""
-                website_code = result.get('website','')
-
-                html_match = re.search(r"(?:```html|<html>)(.*?)(?:```|</html>)", website_code, re.DOTALL | re.IGNORECASE)
-                css_match = re.search(r"(?:```css)(.*?)(?:```)", website_code, re.DOTALL | re.IGNORECASE)
-                js_match = re.search(r"(?:```js|```javascript)(.*?)(?:```)", website_code, re.DOTALL | re.IGNORECASE)
-
-                if html_match:
-                    html_code = html_match.group(1).strip()
-                if css_match:
-                    css_code = css_match.group(1).strip()
-                if js_match:
-                    js_code = js_match.group(1).strip()
-                    smooth_scroll_js = """
-                    document.querySelectorAll('a[href^="#"]').forEach(anchor => {
-                      anchor.addEventListener('click', function(e) {
-                        e.preventDefault();
-                        const targetID = this.getAttribute('href').substring(1);
-                        const targetElement = document.getElementById(targetID);
-                        if (targetElement) {
-                          targetElement.scrollIntoView({ behavior: 'smooth' });
-                        }
-                      });
-                    });
-                    """
-                    
-                    js_code += smooth_scroll_js
-
-                if not (html_code and css_code and js_code):
-                    parts = re.split(r"\d\)\s*[Hh][Tt][Mm][Ll]|CSS|JavaScript|JS", website_code)
-                    if len(parts) >= 4:
-                        html_code = parts[1].strip()
-                        css_code = parts[2].strip()
-                        js_code = parts[3].strip()
-
-                full_html = f"""
-                <html>
-                <head>
-                <style>{css_code}</style>
-                </head>
-                <body>
-                {html_code}
-                <script>{js_code}</script>
-                </body>
-                </html>
-                """
-
-                with tabs[7]:
-                    st.markdown("### Live Website Preview")
-                    st.components.v1.html(full_html, height=600, scrolling=True)
-
-                with tabs[8]:
-                    st.markdown("### Website Code")
-                    st.subheader("HTML")
-                    st.code(html_code, language="html")
-                    st.subheader("CSS")
-                    st.code(css_code, language="css")
-                    st.subheader("JavaScript")
-                    st.code(js_code, language="javascript")
-
-                    zip_buffer = BytesIO()
-                    with zipfile.ZipFile(zip_buffer, "w") as zip_file:
-                        zip_file.writestr("index.html", html_code)
-                        zip_file.writestr("style.css", css_code)
-                        zip_file.writestr("script.js", js_code)
-                    zip_buffer.seek(0)
-
-                    st.download_button(
-                        label="Download Website Files (ZIP)",
-                        data=zip_buffer,
-                        file_name=f"{st.session_state['finalized_name'].replace(' ','_')}_website.zip",
-                        mime="application/zip"
-                    )
-
-else:
+            if gen_flags['website']:
+                with preview_slot.container():
+                    render_website_preview(result.get('website', ''))
+
+        elif generation and generation['lazy']:
+            # Tabs rerun the script when switched, and only the open tab's
+            # asset is generated; results go to the same store as above.
+            gen_tone = generation['tone']
+            tabs = st.tabs(ASSET_TABS, on_change="rerun", key="asset_tabs")
+            for key, (index, title) in ASSET_SECTIONS.items():
+                indexes = [WEBSITE_PREVIEW_TAB, index] if key == "website" else [index]
+                open_index = next((i for i in indexes if tabs[i].open), None)
+                if open_index is None:
+                    continue
+                with tabs[open_index]:
+                    if not generation['flags'][key]:
+                        st.info(f"{title} is not selected above.")
+                        continue
+                    text = stored_asset(key, idea_summary, startup_name, gen_tone)
+                    if text is None:
+                        text = generate_asset_here(key, idea_summary, startup_name, gen_tone, stream_output)
+                        store_asset(key, idea_summary, startup_name, gen_tone, text)
+                    if open_index == WEBSITE_PREVIEW_TAB:
+                        render_website_preview(text)
+                    elif key == "website":
+                        render_website_code(text, startup_name)
+                    else:
+                        render_text_asset(key, text, startup_name)
+
+elif similar_match is None:
     st.info("Enter your startup idea and tone, then press Submit to generate startup names.")
 
+cache_stats = response_cache.stats()
+st.sidebar.caption(
+    f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+    f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries)"
+)
+idea_stats = idea_index.stats()
+st.sidebar.caption(
+    f"Similar-idea cache: {idea_stats['hits']} hits / {idea_stats['lookups']} lookups "
+    f"({idea_stats['mean_lookup_ms']:.2f} ms per lookup, {idea_stats['entries']} ideas)"
+)
+service_stats = service.stats()
+st.sidebar.caption(
+    f"Shared service: {service_stats['in_flight']} calls in flight, "
+    f"{service_stats['coalesced']} coalesced, {service_stats['stored_results']} stored assets"
+)
+prefetch = st.session_state['prefetch']
+if prefetch is not None:
+    prefetch_stats = prefetch.stats()
+    st.sidebar.caption(
+        f"Prefetch: {prefetch_stats['submitted']} assets started, "
+        f"{prefetch_stats['cancelled'] + prefetch_stats['dropped']} dropped before being sent, "
+        f"{prefetch_stats['unused']} made for names not chosen, "
+        f"~{prefetch_stats['spent_tokens']}/{prefetch_stats['budget']} tokens"
+    )
+
+if st.sidebar.checkbox("Show agent metrics"):
+    metrics_summary = agent_metrics.summary()
+    if metrics_summary:
+        st.sidebar.dataframe(metrics_summary, hide_index=True)
+        sent = sum(row['prompt_tokens'] for row in metrics_summary)
+        cached = sum(row['cached_prompt_tokens'] for row in metrics_summary)
+        compacted = sum(row['compacted_tokens'] for row in metrics_summary)
+        st.sidebar.caption(
+            f"Prompt tokens: {sent} sent, ~{compacted} fewer than the prompts before templates, "
+            f"{cached} served from the provider's prompt cache"
+        )
+        truncated = {row['agent']: row['truncated'] for row in metrics_summary if row['truncated']}
+        if truncated:
+            st.sidebar.warning(
+                "Replies cut off at their max_tokens cap: "
+                + ", ".join(f"{agent} ({count})" for agent, count in truncated.items())
+            )
+        stops = sum(row['early_stops'] for row in metrics_summary)
+        if stops:
+            st.sidebar.caption(
+                f"Early stops: {stops} replies cut once complete, "
+                f"~{sum(row['saved_tokens'] for row in metrics_summary)} tokens and "
+                f"~{sum(row['saved_s'] for row in metrics_summary):.1f} s saved"
+            )
+    else:
+        st.sidebar.caption("No agent calls recorded yet.")
+    st.sidebar.download_button(
+        label="Download metrics (JSONL)",
+        data=agent_metrics.to_jsonl(),
+        file_name="agent_metrics.jsonl",
+        mime="application/x-ndjson"
+    )
+    st.sidebar.download_button(
+        label="Download metrics (Prometheus)",
+        data=agent_metrics.to_prometheus(),
+        file_name="agent_metrics.prom",
+        mime="text/plain"
+    )
+
 
 
 
@@ -0,0 +1,172 @@
+import hashlib
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+
+from website_code import minify_parts, parse_website_blocks, preview_document
+
+SMOOTH_SCROLL_JS = """
+document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+  anchor.addEventListener('click', function(e) {
+    e.preventDefault();
+    const targetID = this.getAttribute('href').substring(1);
+    const targetElement = document.getElementById(targetID);
+    if (targetElement) {
+      targetElement.scrollIntoView({ behavior: 'smooth' });
+    }
+  });
+});
+"""
+
+
+SMOOTH_SCROLL_RE = re.compile(r"scroll-behavior\s*:\s*smooth|behavior\s*:\s*['\"]smooth['\"]")
+
+
+def has_smooth_scroll(*parts):
+    return any(SMOOTH_SCROLL_RE.search(part) for part in parts)
+
+
+def parse_website_code(website_code):
+    html_code, css_code, js_code = parse_website_blocks(website_code)
+    # The website agent is asked for smooth scrolling and usually writes its
+    # own; the snippet is only a fallback for replies that forgot it.
+    if js_code and not has_smooth_scroll(html_code, css_code, js_code):
+        js_code += SMOOTH_SCROLL_JS
+    return html_code, css_code, js_code
+
+
+# The preview inlines style.css and script.js, so the page's own references
+# to them would only load nothing (or run the script twice where it exists).
+FILE_REFERENCE_RE = re.compile(
+    r"<link\b[^>]*href=[\"']?(?:\./)?style\.css[\"']?[^>]*>"
+    r"|<script\b[^>]*src=[\"']?(?:\./)?script\.js[\"']?[^>]*>\s*</script\s*>",
+    re.IGNORECASE,
+)
+# Inline data: URIs (base64 images, fonts) are what usually blows up a page.
+LARGE_DATA_URI_RE = re.compile(r"data:[^\"')\s]{2048,}")
+# The preview is sent to the browser on every rerun; bigger pages are only
+# offered as a download.
+PREVIEW_MAX_BYTES = 512 * 1024
+
+
+def preview_payload(html_code, css_code, js_code, max_bytes=PREVIEW_MAX_BYTES):
+    """The live-preview page, minified and without dead file references, or None if it won't fit ``max_bytes``."""
+    html_code, css_code, js_code = minify_parts(FILE_REFERENCE_RE.sub("", html_code), css_code, js_code)
+    document = preview_document(html_code, css_code, js_code)
+    if len(document.encode("utf-8")) > max_bytes:
+        document = LARGE_DATA_URI_RE.sub("about:blank", document)
+    if len(document.encode("utf-8")) > max_bytes:
+        return None
+    return document
+
+
+# Built PDFs/ZIPs are kept by a hash of their input text, so unchanged
+# assets are served from memory instead of being rebuilt on every render.
+ARTIFACT_CACHE_SIZE = 32
+
+_artifacts = OrderedDict()
+_artifacts_lock = threading.Lock()
+
+
+# reportlab is imported when the first PDF is built, not at app start.
+@lru_cache(maxsize=1)
+def pitch_styles():
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Justify', alignment=4, fontSize=12, leading=16))  # 4 = TA_JUSTIFY
+    return styles
+
+
+def create_pitch_pdf(pitch_text, startup_name):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
+
+    styles = pitch_styles()
+
+    flowables = []
+    flowables.append(Paragraph(f"{startup_name} - Elevator Pitch", styles['Title']))
+    flowables.append(Spacer(1, 12))
+
+    for para in pitch_text.split('\n\n'):
+        flowables.append(Paragraph(para.strip(), styles['Justify']))
+        flowables.append(Spacer(1, 12))
+
+    doc.build(flowables)
+    buffer.seek(0)
+    return buffer
+
+
+def create_website_zip(html_code, css_code, js_code, minify=False, compression=zipfile.ZIP_DEFLATED):
+    if minify:
+        html_code, css_code, js_code = minify_parts(html_code, css_code, js_code)
+    zip_buffer = BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", compression=compression, compresslevel=9) as zip_file:
+        zip_file.writestr("index.html", html_code)
+        zip_file.writestr("style.css", css_code)
+        zip_file.writestr("script.js", js_code)
+    zip_buffer.seek(0)
+    return zip_buffer
+
+
+def artifact_key(kind, parts):
+    digest = hashlib.sha256(kind.encode("utf-8"))
+    for part in parts:
+        data = part.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def built_artifact(kind, parts):
+    """Return the bytes already built for this content, or None; never builds them."""
+    with _artifacts_lock:
+        return _artifacts.get(artifact_key(kind, parts))
+
+
+def cached_artifact(kind, parts, build):
+    """Return the bytes built by ``build()`` for this content, building them at most once."""
+    key = artifact_key(kind, parts)
+
+    with _artifacts_lock:
+        if key in _artifacts:
+            _artifacts.move_to_end(key)
+            return _artifacts[key]
+
+    data = build().getvalue()
+    with _artifacts_lock:
+        _artifacts[key] = data
+        while len(_artifacts) > ARTIFACT_CACHE_SIZE:
+            _artifacts.popitem(last=False)
+    return data
+
+
+def pitch_pdf_bytes(pitch_text, startup_name):
+    return cached_artifact("pdf", (pitch_text, startup_name), lambda: create_pitch_pdf(pitch_text, startup_name))
+
+
+def website_zip_bytes(html_code, css_code, js_code, minify=False):
+    kind = "zip-min" if minify else "zip"
+    return cached_artifact(kind, (html_code, css_code, js_code),
+                           lambda: create_website_zip(html_code, css_code, js_code, minify=minify))
+
+
+def website_export_sizes(html_code, css_code, js_code, minify=False):
+    """Byte sizes of the website code and of its ZIP, for reporting savings.
+
+    Returns None until the ZIP has been built for a download; the sizes
+    never build (or minify) anything themselves.
+    """
+    data = built_artifact("zip-min" if minify else "zip", (html_code, css_code, js_code))
+    if data is None:
+        return None
+    return {
+        "source_bytes": sum(len(part.encode("utf-8")) for part in (html_code, css_code, js_code)),
+        "zip_bytes": len(data),
+    }
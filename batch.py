@@ -0,0 +1,216 @@
+"""Generate startup assets for many ideas without the Streamlit UI.
+
+Usage::
+
+    python batch.py ideas.csv results.jsonl --assets tagline,pitch,website --concurrency 4
+
+Ideas are read from a CSV (columns ``idea`` and optionally ``id``, ``tone``,
+``name``) or a JSONL file with the same keys. Results are appended to the
+output JSONL as soon as each idea finishes. Ideas whose id already has an
+``"ok"`` record in the output are skipped, so an interrupted run can simply
+be started again.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from litellm.exceptions import RateLimitError
+
+from pipeline import AGENT_CONCURRENCY, parse_names, run_full_generation, run_name_generation
+
+ASSETS = ["tagline", "pitch", "audience", "brand", "website", "social_media", "competitor", "financials"]
+DEFAULT_ASSETS = ["tagline", "pitch", "audience", "brand", "website"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="CSV or JSONL file of ideas")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--assets", default=",".join(DEFAULT_ASSETS),
+                        help=f"comma-separated subset of: {', '.join(ASSETS)}")
+    parser.add_argument("--tone", default="Formal", help="tone for ideas that don't set one")
+    parser.add_argument("--concurrency", type=int, default=2, help="ideas processed at the same time")
+    parser.add_argument("--agent-concurrency", type=int, default=AGENT_CONCURRENCY,
+                        help="agents run at the same time for one idea")
+    parser.add_argument("--ideas-per-minute", type=float, default=0,
+                        help="cap on how many ideas are started per minute (0 = no cap)")
+    parser.add_argument("--max-retries", type=int, default=4,
+                        help="retries per idea after a provider rate-limit error")
+    parser.add_argument("--combined", action="store_true",
+                        help="request the short assets in one combined call")
+    parser.add_argument("--artifacts-dir", help="also write <id>_pitch.pdf and <id>_website.zip here")
+    args = parser.parse_args(argv)
+
+    args.assets = [asset.strip() for asset in args.assets.split(",") if asset.strip()]
+    unknown = set(args.assets) - set(ASSETS)
+    if unknown:
+        parser.error(f"unknown assets: {', '.join(sorted(unknown))}")
+    return args
+
+
+def read_ideas(path):
+    """Yield idea records one at a time, so large files are never fully loaded."""
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            idea = (row.get("idea") or "").strip()
+            if not idea:
+                continue
+            row["idea"] = idea
+            row["id"] = str(row.get("id") or hashlib.sha256(idea.encode("utf-8")).hexdigest()[:12])
+            yield row
+
+
+def completed_ids(path):
+    done = set()
+    if not Path(path).exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interruption
+            if record.get("status") == "ok":
+                done.add(record.get("id"))
+    return done
+
+
+class StartLimiter:
+    """Spaces out idea starts so a batch stays under a per-minute budget."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+
+def generate_idea(row, tone, args):
+    idea_summary, names_text = run_name_generation(row["idea"])
+    names = parse_names(names_text)
+    name = (row.get("name") or "").strip() or (names[0] if names else "")
+    if not name:
+        raise ValueError("no startup name could be parsed from the model output")
+    flags = {asset: True for asset in args.assets}
+    result = run_full_generation(idea_summary, name, tone, flags,
+                                 max_workers=args.agent_concurrency, combined=args.combined)
+    return {
+        "idea_summary": idea_summary,
+        "names": names,
+        "name": name,
+        "assets": {asset: result.get(asset, "") for asset in args.assets},
+    }
+
+
+def is_rate_limited(error, outcome):
+    if isinstance(error, RateLimitError):
+        return True
+    # Agents report their own failures as "error: ..." strings.
+    return any("RateLimitError" in text for text in outcome.get("assets", {}).values())
+
+
+def process_idea(row, args, limiter):
+    started = time.perf_counter()
+    tone = row.get("tone") or args.tone
+    record = {"id": row["id"], "idea": row["idea"], "tone": tone}
+
+    for attempt in range(args.max_retries + 1):
+        limiter.wait()
+        try:
+            outcome, error = generate_idea(row, tone, args), None
+        except Exception as e:
+            outcome, error = {}, e
+        if attempt == args.max_retries or not is_rate_limited(error, outcome):
+            break
+        # Back off before retrying the idea; cached agents won't be re-billed.
+        time.sleep(min(60.0, 2 ** attempt) + random.uniform(0, 1))
+
+    record.update(outcome)
+    failed = [asset for asset, text in outcome.get("assets", {}).items() if text.startswith("error:")]
+    if error is not None:
+        record.update(status="error", error=str(error))
+    elif failed:
+        record.update(status="error", error=f"failed assets: {', '.join(failed)}")
+    else:
+        record["status"] = "ok"
+        if args.artifacts_dir:
+            write_artifacts(record, Path(args.artifacts_dir))
+    record["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def write_artifacts(record, directory):
+    from artifacts import parse_website_code, pitch_pdf_bytes, website_zip_bytes
+
+    directory.mkdir(parents=True, exist_ok=True)
+    assets = record["assets"]
+    if assets.get("pitch"):
+        (directory / f"{record['id']}_pitch.pdf").write_bytes(pitch_pdf_bytes(assets["pitch"], record["name"]))
+    if assets.get("website"):
+        html_code, css_code, js_code = parse_website_code(assets["website"])
+        (directory / f"{record['id']}_website.zip").write_bytes(website_zip_bytes(html_code, css_code, js_code))
+
+
+def run_batch(args):
+    done = completed_ids(args.output)
+    limiter = StartLimiter(args.ideas_per_minute)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+
+    with open(args.output, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        pending = set()
+
+        def drain(return_when):
+            nonlocal pending
+            finished, pending = wait(pending, return_when=return_when)
+            for future in finished:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                counts[record["status"]] += 1
+                print(f"[{record['status']}] {record['id']} ({record.get('elapsed_s', 0)}s)", file=sys.stderr)
+
+        for row in read_ideas(args.input):
+            if row["id"] in done:
+                counts["skipped"] += 1
+                continue
+            # Keep only a bounded number of ideas in flight.
+            if len(pending) >= args.concurrency * 2:
+                drain(FIRST_COMPLETED)
+            pending.add(pool.submit(process_idea, row, args, limiter))
+        if pending:
+            drain("ALL_COMPLETED")
+
+    return counts
+
+
+def main(argv=None):
+    counts = run_batch(parse_args(argv))
+    print(f"done: {counts['ok']} ok, {counts['error']} failed, {counts['skipped']} already completed",
+          file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
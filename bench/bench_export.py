@@ -0,0 +1,63 @@
+"""Report how much smaller the website download and live preview get.
+
+Usage (from the repository root)::
+
+    python bench/bench_export.py --scale 10
+
+For every reply in ``bench/website_corpus`` the table shows the parsed code
+size, the ZIP as it used to be written (stored, no compression), the
+DEFLATE-compressed ZIP with and without minification, and the preview page
+before and after dropping dead file references and minifying.
+"""
+
+import argparse
+import re
+import sys
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from artifacts import create_website_zip, parse_website_code, preview_payload  # noqa: E402
+from website_code import preview_document  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "website_corpus"
+
+
+def kb(size):
+    return f"{size / 1024:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=int, default=1,
+                        help="repeat each block body this many times to mimic longer replies")
+    args = parser.parse_args()
+
+    totals = [0] * 6
+    print(f"{'sample (KB)':16} {'code':>7} {'stored':>7} {'deflate':>8} {'+minify':>8} {'preview':>8} {'bounded':>8}")
+    for path in sorted(CORPUS.glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        if args.scale > 1:
+            text = re.sub(r"(```\w*\n)(.*?)(\n```)", lambda m: m.group(1) + "\n".join([m.group(2)] * args.scale)
+                          + m.group(3), text, flags=re.DOTALL)
+        parts = parse_website_code(text)
+        payload = preview_payload(*parts, max_bytes=float("inf"))
+        row = [
+            sum(len(part.encode("utf-8")) for part in parts),
+            len(create_website_zip(*parts, compression=zipfile.ZIP_STORED).getvalue()),
+            len(create_website_zip(*parts).getvalue()),
+            len(create_website_zip(*parts, minify=True).getvalue()),
+            len(preview_document(*parts).encode("utf-8")),
+            len(payload.encode("utf-8")),
+        ]
+        totals = [total + size for total, size in zip(totals, row)]
+        print(f"{path.stem:16} " + " ".join(f"{kb(size):>{width}}" for size, width in zip(row, (7, 7, 8, 8, 8, 8))))
+    print(f"{'total':16} " + " ".join(f"{kb(size):>{width}}" for size, width in zip(totals, (7, 7, 8, 8, 8, 8))))
+    print(f"download: {1 - totals[2] / totals[1]:.0%} smaller with DEFLATE, "
+          f"{1 - totals[3] / totals[1]:.0%} with DEFLATE and minification; "
+          f"preview: {1 - totals[5] / totals[4]:.0%} smaller")
+
+
+if __name__ == "__main__":
+    main()
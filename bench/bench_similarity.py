@@ -0,0 +1,112 @@
+"""Measure the near-duplicate idea cache: hit rate, false matches, lookup latency.
+
+Usage (from the repository root)::
+
+    python bench/bench_similarity.py --filler 0
+
+Each pair below is an idea and a rewording of it. The first idea of every
+pair is indexed (along with ``--filler`` synthetic ideas, which make rare
+words weigh more than on a small index); the rewordings should match their
+original, the unrelated ideas (some sharing words with an indexed idea)
+should match nothing. Lookups from another owner must match nothing at all.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from similarity import IdeaIndex  # noqa: E402
+
+PAIRS = [
+    ("An app connecting students with mentors", "Mentor matching app for university students"),
+    ("A meal kit delivery service for busy families", "Meal kits delivered to busy families every week"),
+    ("Marketplace for renting camping gear from locals", "Rent camping gear from people in your area"),
+    ("AI assistant that drafts legal contracts for freelancers", "Contract drafting assistant for freelancers"),
+    ("Subscription box of healthy snacks for offices", "Healthy office snack subscription boxes"),
+    ("Platform for booking dog walkers on demand", "On-demand dog walker booking app"),
+    ("Language exchange app pairing native speakers", "Pair up with native speakers for language exchange"),
+    ("Tool that tracks household energy usage and suggests savings", "Track home energy usage and get saving suggestions"),
+    ("Peer-to-peer textbook resale for college students", "College students reselling textbooks to each other"),
+    ("Virtual fitting room for online clothing stores", "Online clothing stores with a virtual fitting room"),
+    ("Carpooling app for daily office commuters", "Daily commute carpooling for office workers"),
+    ("Platform matching home cooks with neighbours who want homemade food", "Neighbours order homemade food from home cooks"),
+    ("Budgeting app for teenagers with parental controls", "Teen budgeting app that parents can control"),
+    ("Marketplace for local farmers to sell produce directly", "Farmers selling produce directly to local buyers"),
+    ("Scheduling software for small dental clinics", "Appointment scheduling for small dental practices"),
+]
+UNRELATED = [
+    "Drone inspections for wind turbines",
+    "Blockchain ledger for shipping containers",
+    "Smart plant pots that water themselves",
+    "Crowdfunding for indie video games",
+    "Noise-cancelling curtains for apartments",
+    "Translation earbuds for travellers",
+    "Recycling rewards program for plastic bottles",
+    "Voice-controlled cocktail machine",
+    # Same vocabulary as an indexed idea, but a different business.
+    "Mentor matching for first-time startup founders",
+    "Meal planning app for professional athletes",
+    "Dog grooming salon booking software",
+    "Marketplace for renting party supplies",
+    "Budgeting app for small restaurants",
+    # One key word swapped: scored like a rewording, which is why matches
+    # are only offered to the session that indexed the idea.
+    "An app connecting students with tutors",
+    "Platform for booking cat sitters on demand",
+    "Meal planning app for busy families",
+]
+FILLER_WORDS = (
+    "smart cloud local mobile green social secure fast personal shared community "
+    "payments health travel music pets finance retail logistics education housing "
+    "energy fashion gaming fitness food insurance events tickets repair storage "
+    "parking garden kids seniors artists doctors lawyers drivers tutors farmers"
+).split()
+
+
+def filler_ideas(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(FILLER_WORDS, 6)) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filler", type=int, default=0, help="synthetic ideas added to the index")
+    parser.add_argument("--thresholds", default="0.3,0.35,0.4,0.5,0.6")
+    args = parser.parse_args()
+
+    index = IdeaIndex(max_entries=args.filler + len(PAIRS))
+    start = time.perf_counter()
+    for idea in filler_ideas(args.filler):
+        index.add(idea, None)
+    for original, _ in PAIRS:
+        index.add(original, original)
+    build_ms = 1000 * (time.perf_counter() - start)
+
+    # Score everything once with no threshold, then apply each threshold.
+    paraphrase_scores = []
+    for original, reworded in PAIRS:
+        match = index.lookup(reworded, threshold=0.0)
+        paraphrase_scores.append(match.score if match and match.value == original else 0.0)
+    unrelated_scores = []
+    for idea in UNRELATED:
+        match = index.lookup(idea, threshold=0.0)
+        unrelated_scores.append(match.score if match else 0.0)
+    for _, reworded in PAIRS:
+        assert index.lookup(reworded, threshold=0.0, owner="other") is None, reworded
+    stats = index.stats()
+
+    print(f"index: {stats['entries']} ideas built in {build_ms:.1f} ms, "
+          f"{stats['mean_lookup_ms']:.3f} ms per lookup")
+    print(f"{'threshold':>9} {'hit_rate':>9} {'false_matches':>14}")
+    for threshold in (float(value) for value in args.thresholds.split(",")):
+        hits = sum(score >= threshold for score in paraphrase_scores)
+        false = sum(score >= threshold for score in unrelated_scores)
+        print(f"{threshold:9.2f} {hits / len(PAIRS):9.0%} {false:>8}/{len(UNRELATED)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Micro-benchmark the website code extractor against the previous regex version.
+
+Usage (from the repository root)::
+
+    python bench/bench_website_parser.py --repeat 2000
+
+Every reply in ``bench/website_corpus`` is parsed by both extractors; the
+table shows which parts each one found and how long a parse takes. The
+``stream`` column feeds the reply in small chunks, the way the UI does while
+the website agent is still writing.
+
+``expected.json`` in the corpus holds the html/css/js every sample must
+parse to; a mismatch stops the run.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from website_code import FencedBlockParser, parse_website_blocks  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "website_corpus"
+EXPECTED = CORPUS / "expected.json"
+
+
+def legacy_parse(website_code):
+    """The extractor used before the fenced-block parser, kept for comparison."""
+    html_code = css_code = js_code = ""
+
+    html_match = re.search(r"(?:```html|<html>)(.*?)(?:```|</html>)", website_code, re.DOTALL | re.IGNORECASE)
+    css_match = re.search(r"(?:```css)(.*?)(?:```)", website_code, re.DOTALL | re.IGNORECASE)
+    js_match = re.search(r"(?:```js|```javascript)(.*?)(?:```)", website_code, re.DOTALL | re.IGNORECASE)
+
+    if html_match:
+        html_code = html_match.group(1).strip()
+    if css_match:
+        css_code = css_match.group(1).strip()
+    if js_match:
+        js_code = js_match.group(1).strip()
+
+    if not (html_code and css_code and js_code):
+        parts = re.split(r"\d\)\s*[Hh][Tt][Mm][Ll]|CSS|JavaScript|JS", website_code)
+        if len(parts) >= 4:
+            html_code = parts[1].strip()
+            css_code = parts[2].strip()
+            js_code = parts[3].strip()
+
+    return html_code, css_code, js_code
+
+
+def stream_parse(text, chunk_size=16):
+    parser = FencedBlockParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    parser.close()
+    return parser.result()
+
+
+def time_per_call(fn, text, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def found(parts):
+    return "".join(label if part else "-" for label, part in zip("HCJ", parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--scale", type=int, default=1,
+                        help="repeat each block body this many times to mimic longer replies")
+    args = parser.parse_args()
+
+    expected = json.loads(EXPECTED.read_text(encoding="utf-8"))
+    print(f"{'sample':20} {'legacy':>6} {'new':>6} {'legacy_us':>10} {'new_us':>10} {'stream_us':>10}")
+    for path in sorted(CORPUS.glob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        if args.scale > 1:
+            text = re.sub(r"(```\w*\n)(.*?)(\n```)", lambda m: m.group(1) + "\n".join([m.group(2)] * args.scale)
+                          + m.group(3), text, flags=re.DOTALL)
+        if args.scale == 1:
+            parsed = parse_website_blocks(text)._asdict()
+            for part, value in expected[path.stem].items():
+                assert parsed[part] == value, f"{path.name}: unexpected {part} {parsed[part][:60]!r}"
+        streamed = stream_parse(text)
+        # Chunked input must give the same parts as a one-shot parse.
+        assert not streamed.html or streamed == parse_website_blocks(text), path.name
+        print(f"{path.stem:20} {found(legacy_parse(text)):>6} {found(parse_website_blocks(text)):>6} "
+              f"{time_per_call(legacy_parse, text, args.repeat):10.1f} "
+              f"{time_per_call(parse_website_blocks, text, args.repeat):10.1f} "
+              f"{time_per_call(stream_parse, text, args.repeat):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Report what the app's modules cost to import on a cold start.
+
+Usage (from the repository root)::
+
+    python bench/import_time.py --runs 5
+
+Each run imports the app's own modules in a fresh interpreter with
+``python -X importtime`` and reads the cumulative times from its report.
+Heavy third-party packages are listed too, so it is easy to see whether one
+of them is still pulled in at startup instead of on first use.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Already loaded by the time app.py runs, so it is imported first and
+# reported on its own rather than charged to the first module reading a secret.
+PRELOADED = ["streamlit"]
+APP_MODULES = ["pipeline", "artifacts", "domains", "website_code", "service", "jobs"]
+HEAVY_PACKAGES = ["litellm", "reportlab", "requests", "PIL"]
+
+
+def import_times(modules):
+    """Cumulative import time in microseconds per top-level module, from one cold run."""
+    env = dict(os.environ, LITELLM_LOCAL_MODEL_COST_MAP="True")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(PRELOADED + modules)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name in PRELOADED + modules + HEAVY_PACKAGES:
+            times[name] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--modules", default=",".join(APP_MODULES),
+                        help="comma-separated modules imported at startup")
+    args = parser.parse_args()
+
+    modules = [module.strip() for module in args.modules.split(",") if module.strip()]
+    runs = [import_times(modules) for _ in range(args.runs)]
+
+    print(f"{'module':16} {'median_ms':>10} {'loaded':>8}")
+    for name in PRELOADED + modules + HEAVY_PACKAGES:
+        samples = [run[name] for run in runs if name in run]
+        if samples:
+            print(f"{name:16} {statistics.median(samples) / 1000:10.1f} {len(samples)}/{len(runs):<6}")
+        else:
+            print(f"{name:16} {'-':>10} {'no':>8}")
+    total = statistics.median(sum(run.get(name, 0) for name in modules) for run in runs)
+    print(f"app modules total: {total / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
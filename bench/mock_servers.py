@@ -0,0 +1,159 @@
+"""Local stand-ins for the Groq chat API and the DomainsDuck API.
+
+The LLM server speaks the OpenAI chat-completions protocol (plain and SSE
+streaming), so litellm can reach it with ``model="openai/mock"`` and
+``api_base=http://127.0.0.1:<port>/v1``. Responses are shaped like the real
+agents' output and are emitted one token at a time with a configurable
+per-token latency and jitter.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor".split()
+
+
+def fake_reply(prompt, tokens):
+    if '"summary"' in prompt and '"names"' in prompt:
+        summary = " ".join(WORDS[i % len(WORDS)] for i in range(tokens))
+        return json.dumps({"summary": summary, "names": ["Mentora", "Guidely", "Studybridge"]})
+    if "startup names" in prompt:
+        return "1. Mentora\n2. Guidely\n3. Studybridge"
+    if "web developer" in prompt:
+        # Split the budget over the three code blocks the real agent returns.
+        body = " ".join(WORDS[i % len(WORDS)] for i in range(tokens // 3))
+        # Like the real model, it keeps explaining after the last block.
+        return (
+            f"```html\n<section><h1>Mock</h1><p>{body}</p></section>\n```\n\n"
+            f"```css\nbody {{ margin: 0; }} /* {body} */\n```\n\n"
+            f"```javascript\nconsole.log('{body}');\n```\n\n"
+            f"This website includes {body}"
+        )
+    if "social media post ideas" in prompt:
+        # Asked for 5, returns 7, or 5 and a closing remark over two lines.
+        if len(prompt) % 2:
+            return "\n".join(f"{i}. " + " ".join(WORDS[:tokens // 7]) for i in range(1, 8))
+        return ("\n".join(f"{i}. " + " ".join(WORDS[:tokens // 6]) for i in range(1, 6))
+                + "\n\nHope these help! Let me know\nif you need more.")
+    return " ".join(WORDS[i % len(WORDS)] for i in range(tokens))
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    token_latency = 0.01
+    jitter = 0.005
+    tokens = 60
+    website_tokens = 600
+    first_token_latency = 0.2
+    # Fraction of requests answered with a 429 and a Retry-After header.
+    rate_limit_rate = 0.0
+    retry_after = 1
+    # System prompts seen before count as cached prompt tokens, like a
+    # provider-side prefix cache, once they reach its minimum length.
+    cache_min_tokens = 1024
+    seen_prefixes = set()
+    seen_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _sleep(self, seconds):
+        time.sleep(max(0.0, seconds + random.uniform(-self.jitter, self.jitter)))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = "\n".join(message["content"] for message in request["messages"])
+        system = "".join(message["content"] for message in request["messages"] if message["role"] == "system")
+        if random.random() < self.rate_limit_rate:
+            data = json.dumps({"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}).encode()
+            self.send_response(429)
+            self.send_header("Retry-After", str(self.retry_after))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        tokens = self.website_tokens if "web developer" in prompt else self.tokens
+        # A reply longer than max_tokens is cut short, like a real provider.
+        finish_reason = "length" if tokens > (request.get("max_tokens") or tokens) else "stop"
+        tokens = min(tokens, request.get("max_tokens") or tokens)
+        reply = fake_reply(prompt, tokens)
+        for stop in request.get("stop") or []:
+            reply = reply.split(stop, 1)[0]
+        pieces = reply.split(" ")
+        with self.seen_lock:
+            cached = len(system.split()) if system in self.seen_prefixes else 0
+            cached = cached if cached >= self.cache_min_tokens else 0
+            self.seen_prefixes.add(system)
+        usage = {
+            "prompt_tokens": len(prompt.split()),
+            "completion_tokens": len(pieces),
+            "total_tokens": len(prompt.split()) + len(pieces),
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+        self._sleep(self.first_token_latency)
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            try:
+                for i, piece in enumerate(pieces):
+                    delta = {"content": piece if i == 0 else " " + piece}
+                    self._send_event({"choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+                    self._sleep(self.token_latency)
+                self._send_event({"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client stopped reading early
+            return
+
+        self._sleep(self.token_latency * len(pieces))
+        payload = {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": finish_reason}],
+            "usage": usage,
+        }
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event(self, payload):
+        self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+        self.wfile.flush()
+
+
+class MockDomainHandler(BaseHTTPRequestHandler):
+    latency = 0.15
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        domain = parse_qs(urlparse(self.path).query).get("domain", [""])[0]
+        time.sleep(self.latency)
+        # Deterministic answer so repeated runs see the same availability.
+        data = json.dumps({"domain": domain, "availability": "true" if len(domain) % 2 else "false"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(handler):
+    """Start ``handler`` on a free local port in a daemon thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
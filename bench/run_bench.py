@@ -0,0 +1,237 @@
+"""Benchmark the agent pipeline against local mock servers.
+
+Usage (from the repository root)::
+
+    python bench/run_bench.py --iterations 5 --token-latency 0.01 --jitter 0.005
+
+Nothing here talks to Groq or DomainsDuck: both are replaced by the mock
+servers in ``bench/mock_servers.py``, so numbers are comparable between runs
+and between branches.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mock_servers import MockDomainHandler, MockLLMHandler, start_server  # noqa: E402
+
+IDEA = "An app that connects university students with industry mentors for career advice."
+ALL_ASSETS = {
+    "tagline": True,
+    "pitch": True,
+    "audience": True,
+    "brand": True,
+    "website": True,
+    "social_media": True,
+    "competitor": True,
+    "financials": True,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--sessions", type=int, default=4,
+                        help="concurrent full generations for the throughput run")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="seconds per generated token")
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.005, help="+/- seconds added to every delay")
+    parser.add_argument("--tokens", type=int, default=60, help="tokens per short agent reply")
+    parser.add_argument("--website-tokens", type=int, default=600)
+    parser.add_argument("--domain-latency", type=float, default=0.15)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0,
+                        help="fraction of LLM requests the mock rejects with a 429")
+    parser.add_argument("--rpm", type=int, default=100000, help="client-side requests/min budget")
+    parser.add_argument("--tpm", type=int, default=10000000, help="client-side tokens/min budget")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args()
+
+
+def configure(args):
+    MockLLMHandler.token_latency = args.token_latency
+    MockLLMHandler.first_token_latency = args.first_token_latency
+    MockLLMHandler.jitter = args.jitter
+    MockLLMHandler.tokens = args.tokens
+    MockLLMHandler.website_tokens = args.website_tokens
+    MockLLMHandler.rate_limit_rate = args.rate_limit_rate
+    MockDomainHandler.latency = args.domain_latency
+
+    llm = start_server(MockLLMHandler)
+    domains = start_server(MockDomainHandler)
+    # The pipeline reads these at import time, so set them first.
+    os.environ["LLM_MODEL"] = "openai/mock"
+    os.environ["LLM_API_BASE"] = f"http://127.0.0.1:{llm.server_port}/v1"
+    os.environ["GROQ_API_KEY"] = "mock"
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.rpm)
+    os.environ["LLM_TOKENS_PER_MINUTE"] = str(args.tpm)
+    os.environ["DOMAINSDUCK_URL"] = f"http://127.0.0.1:{domains.server_port}/api/get/"
+    os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+
+def measure(fn, iterations, setup=None):
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile; with few samples the high ones equal the max."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples):
+    return {
+        "mean_s": statistics.mean(samples),
+        "p50_s": statistics.median(samples),
+        "p95_s": percentile(samples, 95),
+        "p99_s": percentile(samples, 99),
+        "max_s": max(samples),
+        "n": len(samples),
+    }
+
+
+def check_stream(events):
+    """Fail if a streamed asset shows text its stop condition later cuts away."""
+    from output_monitor import trim_to_condition
+
+    shown = {}
+    for key, text, done in events:
+        if done and not text.startswith("error:"):
+            assert text.startswith(shown.get(key, "").strip()), f"{key}: shown {shown[key][-40:]!r}, got {text[-40:]!r}"
+            assert trim_to_condition(key, text) == text, f"{key}: kept text past the cut {text[-40:]!r}"
+        shown[key] = text
+
+
+def main():
+    args = parse_args()
+    configure(args)
+
+    import domains
+    import pipeline
+    from service import GenerationService
+
+    service = GenerationService()
+
+    def cold():
+        pipeline.response_cache.clear()
+        domains.clear_domain_cache()
+
+    idea_summary, names_text = pipeline.run_name_generation(IDEA)
+    names = pipeline.parse_names(names_text)
+
+    def first_stream_event():
+        events = pipeline.stream_full_generation(idea_summary, names[0], "Formal", ALL_ASSETS)
+        next(events)
+        first = time.perf_counter()
+        for _ in events:
+            pass
+        return first
+
+    ttft = []
+    for _ in range(args.iterations):
+        cold()
+        start = time.perf_counter()
+        ttft.append(first_stream_event() - start)
+
+    def sessions():
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            for i in range(args.sessions):
+                pool.submit(pipeline.run_full_generation, idea_summary, names[0], f"Tone {i}", ALL_ASSETS)
+
+    def identical_sessions():
+        # Every session submits the same request through the shared service,
+        # so in-flight calls are coalesced instead of repeated.
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            for _ in range(args.sessions):
+                pool.submit(service.run_full_generation, idea_summary, names[0], "Formal", ALL_ASSETS)
+
+    results = {
+        **{
+            f"run_name_generation_{mode}": summarize(measure(
+                lambda mode=mode: pipeline.run_name_generation(IDEA, mode=mode), args.iterations, cold))
+            for mode in ("serial", "parallel", "fused")
+        },
+        "run_full_generation": summarize(measure(
+            lambda: pipeline.run_full_generation(idea_summary, names[0], "Formal", ALL_ASSETS), args.iterations, cold)),
+        "run_full_generation_cached": summarize(measure(
+            lambda: pipeline.run_full_generation(idea_summary, names[0], "Formal", ALL_ASSETS), args.iterations)),
+        "stream_full_generation_first_token": summarize(ttft),
+        "stream_full_generation": summarize(measure(
+            lambda: check_stream(pipeline.stream_full_generation(idea_summary, names[0], "Formal", ALL_ASSETS)),
+            args.iterations, cold)),
+        "check_domains_cold": summarize(measure(
+            lambda: domains.check_domains(names, "mock"), args.iterations, cold)),
+        "check_domains_cached": summarize(measure(
+            lambda: domains.check_domains(names, "mock"), args.iterations)),
+    }
+    session_samples = measure(sessions, args.iterations, cold)
+    results["concurrent_sessions"] = summarize(session_samples)
+    results["concurrent_sessions"]["generations_per_s"] = args.sessions / statistics.mean(session_samples)
+    calls_before = pipeline.inflight.coalesced
+    results["identical_sessions_shared"] = summarize(measure(identical_sessions, args.iterations, cold))
+    results["identical_sessions_shared"]["coalesced_calls"] = pipeline.inflight.coalesced - calls_before
+
+    print(f"{'benchmark':38} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for name, stats in results.items():
+        print(f"{name:38} {stats['mean_s']:9.3f} {stats['p50_s']:9.3f} {stats['p95_s']:9.3f} "
+              f"{stats['p99_s']:9.3f} {stats['max_s']:9.3f}")
+    print(f"throughput: {results['concurrent_sessions']['generations_per_s']:.2f} full generations/s "
+          f"with {args.sessions} concurrent sessions")
+    print(f"shared service: {results['identical_sessions_shared']['coalesced_calls']} calls coalesced "
+          f"across {args.sessions} identical sessions x {args.iterations} iterations")
+    calls = pipeline.agent_metrics.summary()
+    results["agents"] = calls
+    print(f"\n{'agent':14} {'calls':>6} {'cached':>7} {'mean_s':>8} {'max_s':>8} {'ttft_s':>8} {'out_tokens':>11}")
+    for row in calls:
+        ttft = f"{row['mean_ttft_s']:8.3f}" if row["mean_ttft_s"] is not None else f"{'-':>8}"
+        print(f"{row['agent']:14} {row['calls']:6} {row['cache_hits']:7} {row['mean_wall_s']:8.3f} "
+              f"{row['max_wall_s']:8.3f} {ttft} {row['completion_tokens']:11}")
+    print()
+    results["provider"] = {
+        "retries": sum(row["retries"] for row in calls),
+        "errors": sum(row["errors"] for row in calls),
+    }
+    print(f"provider: {results['provider']['retries']} retries, {results['provider']['errors']} failed calls")
+    results["truncated"] = {row["agent"]: row["truncated"] for row in calls if row["truncated"]}
+    print(f"cut off at max_tokens: {sum(results['truncated'].values())} replies "
+          f"{results['truncated'] or ''}")
+    results["early_stops"] = {
+        "calls": sum(row["early_stops"] for row in calls),
+        "saved_tokens": sum(row["saved_tokens"] for row in calls),
+        "saved_s": sum(row["saved_s"] for row in calls),
+    }
+    print(f"early stops: {results['early_stops']['calls']} replies cut, "
+          f"~{results['early_stops']['saved_tokens']} completion tokens and "
+          f"~{results['early_stops']['saved_s']:.2f} s of generation saved")
+    results["prompts"] = {
+        field: sum(row[field] for row in calls)
+        for field in ("prompt_tokens", "prefix_tokens", "cached_prompt_tokens", "trimmed_tokens", "compacted_tokens")
+    }
+    sent = results["prompts"]["prompt_tokens"]
+    previous = sent + results["prompts"]["compacted_tokens"] or 1
+    print(f"prompts: {sent} prompt tokens, ~{results['prompts']['compacted_tokens']} "
+          f"({results['prompts']['compacted_tokens'] / previous:.0%}) fewer than the prompts before templates, "
+          f"{results['prompts']['cached_prompt_tokens']} served from the provider prefix cache, "
+          f"{results['prompts']['trimmed_tokens']} trimmed to fit budgets")
+
+    if args.json_path:
+        results["config"] = vars(args)
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
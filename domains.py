@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_cache import InFlight
+
+DOMAINSDUCK_URL = os.environ.get("DOMAINSDUCK_URL", "https://us.domainsduck.com/api/get/")
+DOMAIN_TLDS = (".com", ".io", ".ai")
+
+# (connect, read) timeouts in seconds for a single DomainsDuck request.
+DOMAIN_TIMEOUT = (3.05, 10)
+# Availability barely changes while a user is picking a name, so both
+# "available" and "taken" answers are reused for a while. Errors are not.
+DOMAIN_CACHE_TTL = 6 * 60 * 60
+DOMAIN_WORKERS = 9
+
+
+def make_session(pool_size=DOMAIN_WORKERS):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+_cache = {}
+_cache_lock = threading.Lock()
+# Concurrent checks of the same domain (e.g. two users trying the same
+# name) share one request.
+_inflight = InFlight()
+
+
+def get_session():
+    """Create the pooled session (and import requests) on the first check."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def clear_domain_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def check_domain_availability(domain: str, api_key: str) -> str:
+    domain = domain.lower()
+    now = time.time()
+    with _cache_lock:
+        entry = _cache.get(domain)
+        if entry is not None and now - entry[1] < DOMAIN_CACHE_TTL:
+            return entry[0]
+    return _inflight.run(domain, lambda: fetch_domain_availability(domain, api_key, now))
+
+
+def fetch_domain_availability(domain, api_key, now):
+    params = {
+        "domain": domain,
+        "apikey": api_key,
+    }
+    try:
+        response = get_session().get(DOMAINSDUCK_URL, params=params, timeout=DOMAIN_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        availability = str(data.get("availability", "unknown"))
+    except Exception as e:
+        return f"error: {str(e)}"
+
+    with _cache_lock:
+        _cache[domain] = (availability, now)
+    return availability
+
+
+def domain_candidates(name: str, tlds=DOMAIN_TLDS):
+    base = name.lower().replace(" ", "")
+    return [base + tld for tld in tlds]
+
+
+def check_domains(names, api_key: str, tlds=DOMAIN_TLDS, max_workers=DOMAIN_WORKERS):
+    """Check every name against every TLD in parallel; returns {domain: status}."""
+    domains = []
+    for name in names:
+        if name:
+            for domain in domain_candidates(name, tlds):
+                if domain not in domains:
+                    domains.append(domain)
+    if not domains:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(domains)))) as pool:
+        statuses = pool.map(lambda domain: check_domain_availability(domain, api_key), domains)
+        return dict(zip(domains, statuses))
@@ -0,0 +1,268 @@
+"""Background generation jobs, stored in SQLite and run by a worker.
+
+Run a worker next to the app with::
+
+    python jobs.py
+
+The app submits jobs to the same database (JOB_QUEUE_DB, by default
+``jobs.db`` next to this file) and polls them,
+so a generation keeps running when the browser tab reloads and a finished
+job can be opened again later by its id. Without a separate worker the app
+runs one in a background thread (see start_worker_thread).
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from pipeline import get_secret, stream_full_generation
+
+JOB_QUEUE_DB = get_secret("JOB_QUEUE_DB", str(Path(__file__).parent / "jobs.db"))
+# Finished jobs are kept this long so they can be reopened without
+# recomputation.
+JOB_RETENTION = 7 * 24 * 60 * 60
+# Partial text is written back at most this often per asset while an agent
+# is still writing.
+PROGRESS_INTERVAL = 0.5
+# A job still marked "running" this long after its last update belonged to
+# a worker that died; it is queued again. Workers look for such jobs every
+# STALE_CHECK_INTERVAL seconds.
+STALE_JOB_AGE = 10 * 60
+STALE_CHECK_INTERVAL = 60
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobQueue:
+    """SQLite-backed queue of generation jobs with per-asset progress."""
+
+    def __init__(self, db_path=JOB_QUEUE_DB):
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock:
+            # WAL lets the app read progress while a worker process writes it.
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, "
+                "error TEXT, created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS job_assets ("
+                "job_id TEXT NOT NULL, asset TEXT NOT NULL, status TEXT NOT NULL, "
+                "text TEXT NOT NULL DEFAULT '', updated REAL NOT NULL, "
+                "PRIMARY KEY (job_id, asset))"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def job_id(request):
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def submit(self, idea_summary, selected_name, tone, generate_flags, combined=False):
+        """Queue a generation and return its id.
+
+        Ids are derived from the request, so submitting the same request
+        again returns the queued, running or finished job instead of
+        starting another one. Failed jobs are queued again, and a finished
+        job whose assets partly failed is queued to rerun just those.
+        """
+        assets = [key for key, selected in generate_flags.items() if selected]
+        request = {
+            "idea_summary": idea_summary,
+            "name": selected_name,
+            "tone": tone,
+            "assets": assets,
+            "combined": combined,
+        }
+        job_id = self.job_id(request)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row[0] in ACTIVE_STATUSES:
+                return job_id
+            if row is not None and row[0] == "done":
+                retry = self._db.execute(
+                    "UPDATE job_assets SET status = 'waiting', text = '', updated = ? "
+                    "WHERE job_id = ? AND status != 'done'",
+                    (now, job_id),
+                ).rowcount
+                if retry:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'queued', error = NULL, updated = ? WHERE id = ?", (now, job_id)
+                    )
+                self._db.commit()
+                return job_id
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, request, error, created, updated) "
+                "VALUES (?, 'queued', ?, NULL, ?, ?)",
+                (job_id, json.dumps(request), now, now),
+            )
+            self._db.execute("DELETE FROM job_assets WHERE job_id = ?", (job_id,))
+            self._db.executemany(
+                "INSERT INTO job_assets (job_id, asset, status, updated) VALUES (?, ?, 'waiting', ?)",
+                [(job_id, asset, now) for asset in assets],
+            )
+            self._db.commit()
+        return job_id
+
+    def claim(self):
+        """Mark the oldest queued job as running and return it, or None."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE jobs SET status = 'running', updated = ? WHERE id = ?", (now, row[0]))
+            self._db.commit()
+        return self.get(row[0])
+
+    def update_asset(self, job_id, asset, text, done):
+        now = time.time()
+        status = ("failed" if text.startswith("error:") else "done") if done else "running"
+        with self._lock:
+            self._db.execute(
+                "UPDATE job_assets SET status = ?, text = ?, updated = ? WHERE job_id = ? AND asset = ?",
+                (status, text, now, job_id, asset),
+            )
+            self._db.execute("UPDATE jobs SET updated = ? WHERE id = ?", (now, job_id))
+            self._db.commit()
+
+    def finish(self, job_id, error=None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                ("failed" if error else "done", error, time.time(), job_id),
+            )
+            self._db.commit()
+
+    def get(self, job_id):
+        """Return the job with its request and per-asset status/text, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, request, error, created, updated FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            assets = self._db.execute(
+                "SELECT asset, status, text FROM job_assets WHERE job_id = ? ORDER BY rowid", (job_id,)
+            ).fetchall()
+        status, request, error, created, updated = row
+        return {
+            "id": job_id,
+            "status": status,
+            "request": json.loads(request),
+            "error": error,
+            "created": created,
+            "updated": updated,
+            "assets": {asset: {"status": asset_status, "text": text} for asset, asset_status, text in assets},
+        }
+
+    def requeue_stale(self, max_age=STALE_JOB_AGE):
+        """Queue running jobs not updated for ``max_age`` seconds again.
+
+        With ``max_age=0`` every running job is queued again, which is right
+        only when no other worker can be running one.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND updated < ?",
+                (time.time() - max_age,),
+            )
+            self._db.commit()
+
+    def prune(self, max_age=JOB_RETENTION):
+        cutoff = time.time() - max_age
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM job_assets WHERE job_id IN (SELECT id FROM jobs WHERE updated < ?)", (cutoff,)
+            )
+            self._db.execute("DELETE FROM jobs WHERE updated < ?", (cutoff,))
+            self._db.commit()
+
+
+def run_job(job_queue, job, executor=None):
+    request = job["request"]
+    # Assets finished by an earlier run (before a retry or a worker restart)
+    # are kept as they are.
+    flags = {asset: True for asset, info in job["assets"].items() if info["status"] != "done"}
+    last_write = {}
+    if not flags:
+        job_queue.finish(job["id"])
+        return
+    try:
+        for key, text, done in stream_full_generation(
+            request["idea_summary"],
+            request["name"],
+            request["tone"],
+            flags,
+            combined=request["combined"],
+            executor=executor,
+        ):
+            now = time.monotonic()
+            if done or now - last_write.get(key, 0.0) >= PROGRESS_INTERVAL:
+                job_queue.update_asset(job["id"], key, text, done)
+                last_write[key] = now
+    except Exception as e:
+        job_queue.finish(job["id"], error=str(e))
+        return
+    job_queue.finish(job["id"])
+
+
+def run_worker(job_queue, poll_interval=1.0, executor=None, stop=None):
+    """Run queued jobs one after another until ``stop`` is set."""
+    last_prune = last_stale_check = 0.0
+    while stop is None or not stop.is_set():
+        # Not only at startup: a worker that died a moment ago leaves jobs
+        # that only become stale later.
+        if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL:
+            job_queue.requeue_stale()
+            last_stale_check = time.monotonic()
+        job = job_queue.claim()
+        if job is not None:
+            run_job(job_queue, job, executor)
+            continue
+        if time.monotonic() - last_prune > 60 * 60:
+            job_queue.prune()
+            last_prune = time.monotonic()
+        time.sleep(poll_interval)
+
+
+def start_worker_thread(job_queue, executor=None):
+    """Run the only worker in a thread of this process.
+
+    No other worker shares the queue, so a job still marked running was
+    interrupted when the server last stopped and is queued again right away.
+    """
+    job_queue.requeue_stale(max_age=0)
+    thread = threading.Thread(target=run_worker, args=(job_queue,), kwargs={"executor": executor},
+                              name="pitchcraft-jobs", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default=JOB_QUEUE_DB, help="job database shared with the app")
+    parser.add_argument("--poll", type=float, default=1.0, help="seconds between checks for new jobs")
+    args = parser.parse_args(argv)
+    print(f"worker polling {args.db}", file=sys.stderr)
+    try:
+        run_worker(JobQueue(args.db), poll_interval=args.poll)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import json
+import threading
+import time
+from collections import deque
+
+
+class AgentMetrics:
+    """Per-call latency, token and cost records, labelled by agent.
+
+    The most recent ``max_records`` calls are kept in memory for the debug
+    panel. When ``log_path`` is given every record is also appended to it as
+    one JSON line.
+    """
+
+    def __init__(self, max_records=1000, log_path=None):
+        self.log_path = log_path
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, agent, started, first_token=None, usage=None, cost=None,
+               cache_hit=False, retries=0, error=None, model=None, prefix_tokens=0, trimmed_tokens=0,
+               compacted_tokens=0,
+               stopped_early=False, saved_tokens=0, saved_s=0.0, truncated=False):
+        now = time.perf_counter()
+        usage = usage or {}
+        details = usage.get("prompt_tokens_details") or {}
+        cached_tokens = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)
+        entry = {
+            "ts": time.time(),
+            "agent": agent,
+            "model": model,
+            "wall_s": round(now - started, 4),
+            "ttft_s": round(first_token - started, 4) if first_token is not None else None,
+            "prompt_tokens": usage.get("prompt_tokens", 0) or 0,
+            "completion_tokens": usage.get("completion_tokens", 0) or 0,
+            # Static prompt prefix sent, the part of the prompt the provider
+            # reported as served from its prompt cache, idea text cut to stay
+            # within the agent's prompt budget, and static tokens saved
+            # against the prompts used before templates (see prompts.py).
+            "prefix_tokens": prefix_tokens,
+            "cached_prompt_tokens": cached_tokens or 0,
+            "trimmed_tokens": trimmed_tokens,
+            "compacted_tokens": compacted_tokens,
+            # Replies cut off by their stop condition (see output_monitor.py),
+            # with the estimated completion tokens and seconds not spent.
+            "stopped_early": stopped_early,
+            "saved_tokens": saved_tokens,
+            "saved_s": round(saved_s, 4),
+            # The provider stopped at max_tokens (finish_reason "length"), so
+            # the reply is probably incomplete and the cap too tight.
+            "truncated": truncated,
+            "cost_usd": cost,
+            "cache_hit": cache_hit,
+            "retries": retries,
+            "error": error,
+        }
+        with self._lock:
+            self._records.append(entry)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def load(self, path):
+        """Add the records an earlier run appended to ``path``; unreadable lines are skipped."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        with self._lock:
+            self._records.extend(entry for entry in entries if isinstance(entry, dict) and "completion_tokens" in entry)
+
+    def typical_completion_tokens(self, agent):
+        """Median completion length of the agent's full (not cut off) replies, or None."""
+        lengths = sorted(
+            entry["completion_tokens"] for entry in self.records()
+            if entry["agent"] == agent and entry["completion_tokens"] and not entry.get("stopped_early")
+        )
+        return lengths[len(lengths) // 2] if lengths else None
+
+    def summary(self):
+        """Aggregate the recorded calls into one row per agent."""
+        rows = {}
+        for entry in self.records():
+            row = rows.setdefault(entry["agent"], {
+                "agent": entry["agent"],
+                "calls": 0,
+                "cache_hits": 0,
+                "errors": 0,
+                "retries": 0,
+                "total_wall_s": 0.0,
+                "max_wall_s": 0.0,
+                "mean_ttft_s": None,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "prefix_tokens": 0,
+                "cached_prompt_tokens": 0,
+                "trimmed_tokens": 0,
+                "compacted_tokens": 0,
+                "early_stops": 0,
+                "truncated": 0,
+                "saved_tokens": 0,
+                "saved_s": 0.0,
+                "cost_usd": 0.0,
+                "_ttfts": [],
+                "_lengths": [],
+            })
+            row["calls"] += 1
+            row["cache_hits"] += int(entry["cache_hit"])
+            row["errors"] += int(entry["error"] is not None)
+            row["retries"] += entry["retries"]
+            row["total_wall_s"] += entry["wall_s"]
+            row["max_wall_s"] = max(row["max_wall_s"], entry["wall_s"])
+            row["prompt_tokens"] += entry["prompt_tokens"]
+            row["completion_tokens"] += entry["completion_tokens"]
+            for field in ("prefix_tokens", "cached_prompt_tokens", "trimmed_tokens", "compacted_tokens",
+                          "saved_tokens", "saved_s"):
+                row[field] += entry.get(field, 0)
+            row["early_stops"] += int(entry.get("stopped_early", False))
+            row["truncated"] += int(entry.get("truncated", False))
+            row["cost_usd"] += entry["cost_usd"] or 0.0
+            if entry["ttft_s"] is not None and not entry["cache_hit"]:
+                row["_ttfts"].append(entry["ttft_s"])
+            if entry["completion_tokens"]:
+                row["_lengths"].append(entry["completion_tokens"])
+
+        summary = []
+        for row in rows.values():
+            ttfts = row.pop("_ttfts")
+            lengths = sorted(row.pop("_lengths"))
+            # Output-length statistics used to choose each agent's max_tokens.
+            row["length_samples"] = len(lengths)
+            row["p95_completion_tokens"] = lengths[min(len(lengths) - 1, int(len(lengths) * 0.95))] if lengths else None
+            row["suggested_max_tokens"] = int(row["p95_completion_tokens"] * 1.25) + 8 if lengths else None
+            row["mean_wall_s"] = round(row["total_wall_s"] / row["calls"], 4)
+            row["total_wall_s"] = round(row["total_wall_s"], 4)
+            row["saved_s"] = round(row["saved_s"], 4)
+            row["mean_ttft_s"] = round(sum(ttfts) / len(ttfts), 4) if ttfts else None
+            summary.append(row)
+        return sorted(summary, key=lambda row: row["total_wall_s"], reverse=True)
+
+    def to_jsonl(self):
+        return "".join(json.dumps(entry) + "\n" for entry in self.records())
+
+    def to_prometheus(self, prefix="pitchcraft_agent"):
+        """Render the per-agent totals in the Prometheus text exposition format."""
+        metrics = [
+            ("calls_total", "counter", "Completed agent calls.", "calls"),
+            ("cache_hits_total", "counter", "Agent calls answered from the response cache.", "cache_hits"),
+            ("errors_total", "counter", "Agent calls that raised an error.", "errors"),
+            ("retries_total", "counter", "Retried provider requests.", "retries"),
+            ("wall_seconds_total", "counter", "Wall time spent in agent calls.", "total_wall_s"),
+            ("prompt_tokens_total", "counter", "Prompt tokens sent to the provider.", "prompt_tokens"),
+            ("completion_tokens_total", "counter", "Completion tokens received from the provider.", "completion_tokens"),
+            ("prefix_tokens_total", "counter", "Estimated static prompt-prefix tokens sent.", "prefix_tokens"),
+            ("cached_prompt_tokens_total", "counter", "Prompt tokens the provider served from its cache.",
+             "cached_prompt_tokens"),
+            ("trimmed_tokens_total", "counter", "Estimated idea tokens cut to fit prompt budgets.", "trimmed_tokens"),
+            ("compacted_tokens_total", "counter", "Estimated prompt tokens saved against the pre-template prompts.",
+             "compacted_tokens"),
+            ("early_stops_total", "counter", "Replies cut off once their stop condition was met.", "early_stops"),
+            ("truncated_total", "counter", "Replies the provider cut off at max_tokens.", "truncated"),
+            ("saved_tokens_total", "counter", "Estimated completion tokens not generated due to early stops.",
+             "saved_tokens"),
+            ("saved_seconds_total", "counter", "Estimated generation time saved by early stops.", "saved_s"),
+            ("cost_usd_total", "counter", "Estimated provider cost in USD.", "cost_usd"),
+            ("ttft_seconds_mean", "gauge", "Mean time to first token for uncached calls.", "mean_ttft_s"),
+        ]
+        summary = self.summary()
+        lines = []
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for row in summary:
+                if row[field] is not None:
+                    lines.append(f'{prefix}_{name}{{agent="{row["agent"]}"}} {row[field]}')
+        return "\n".join(lines) + "\n"
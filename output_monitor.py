@@ -0,0 +1,158 @@
+import re
+
+# Structural stop conditions for streamed agent output. Each one is fed the
+# reply chunk by chunk and returns the length the reply should be cut to as
+# soon as it has everything that was asked for, so the rest of the
+# generation (trailing explanations, extra list items) is never paid for.
+# Conditions keep state, so create a fresh one per call (see stop_condition).
+#
+# Text past ``settled()`` may still be cut away, so the stream holds it back
+# instead of showing it.
+#
+# Non-streamed calls can't be cut client-side; the ``stop_sequences`` of a
+# condition, where it has any, let the provider stop at the same point.
+
+FENCE = "```"
+NUMBERED_ITEM_RE = re.compile(r"^\s*\(?(\d+)[.):]\s")
+
+
+class LineMonitor:
+    """Base class: calls ``line(text, start, end)`` once per completed line."""
+
+    stop_sequences = ()
+
+    def __init__(self):
+        self.text = ""
+        self._scanned = 0
+
+    def feed(self, chunk):
+        """Add a chunk; return the cut position in the full text, or None to keep going."""
+        self.text += chunk
+        while True:
+            end = self.text.find("\n", self._scanned)
+            if end == -1:
+                return None
+            start, self._scanned = self._scanned, end + 1
+            cut = self.line(self.text[start:end], start, end + 1)
+            if cut is not None:
+                return cut
+
+    def settled(self):
+        """Length of the text that no later chunk can cut away."""
+        return len(self.text)
+
+    def line(self, line, start, end):
+        raise NotImplementedError
+
+
+class FencedBlocks(LineMonitor):
+    """Stop once ``count`` fenced code blocks have been closed."""
+
+    def __init__(self, count=3):
+        super().__init__()
+        self.count = count
+        self.closed = 0
+        self._open = False
+
+    def line(self, line, start, end):
+        if not line.strip().startswith(FENCE):
+            return None
+        self._open = not self._open
+        if not self._open:
+            self.closed += 1
+            if self.closed >= self.count:
+                return end
+        return None
+
+
+class NumberedItems(LineMonitor):
+    """Stop after ``count`` numbered list items, before item ``count + 1``
+    or any unindented text that follows the list after a blank line."""
+
+    def __init__(self, count):
+        super().__init__()
+        self.count = count
+        self.items = 0
+        self._blank = False
+        self.stop_sequences = (f"\n{count + 1}.", f"\n{count + 1})")
+
+    def line(self, line, start, end):
+        if NUMBERED_ITEM_RE.match(line):
+            if self.items >= self.count:
+                return start
+            self.items += 1
+        elif not line.strip():
+            self._blank = self.items >= self.count
+        elif self._blank and not line[:1].isspace():
+            return start
+        return None
+
+    def settled(self):
+        # Once the list is complete, a line is only safe to show after its
+        # newline: it may turn out to be an extra item or trailing prose.
+        return self._scanned if self.items >= self.count else len(self.text)
+
+
+class WordLimit:
+    """Stop at the end of the first line of content, or after ``limit`` words.
+
+    Lead-in lines ("Here is a tagline:") are not content and are skipped.
+    There are no provider stop sequences: a blank line may come before the
+    content rather than after it.
+    """
+
+    stop_sequences = ()
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.text = ""
+        self._settled = 0
+
+    def feed(self, chunk):
+        self.text += chunk
+        start = 0
+        while True:
+            start = len(self.text) - len(self.text[start:].lstrip())
+            newline = self.text.find("\n", start)
+            line = self.text[start:] if newline == -1 else self.text[start:newline]
+            if newline != -1 and line.rstrip().endswith(":"):
+                start = newline + 1
+                continue
+            words = list(re.finditer(r"\S+", line))
+            # A word is only complete once the whitespace after it has arrived.
+            if len(words) > self.limit:
+                return start + words[self.limit - 1].end()
+            if newline != -1:
+                return newline
+            # Whitespace after the last word is cut away if it ends the line.
+            self._settled = start + words[-1].end() if words else start
+            return None
+
+    def settled(self):
+        return self._settled
+
+
+# Agents whose output has a known shape. The limits leave a little slack
+# over what the prompts ask for (3 blocks, 5 posts, under 10 words).
+STOP_CONDITIONS = {
+    "website": lambda: FencedBlocks(3),
+    "social_media": lambda: NumberedItems(5),
+    "tagline": lambda: WordLimit(12),
+}
+
+
+def stop_condition(agent):
+    factory = STOP_CONDITIONS.get(agent)
+    return factory() if factory else None
+
+
+def stop_sequences(agent):
+    condition = stop_condition(agent)
+    return list(condition.stop_sequences) if condition else []
+
+
+def trim_to_condition(agent, text):
+    """Cut a complete reply where its stop condition would have stopped the stream."""
+    condition = stop_condition(agent)
+    cut = condition.feed(text + "\n") if condition else None
+    return text if cut is None else text[:cut].strip()
@@ -0,0 +1,827 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+from llm_cache import InFlight, ResponseCache
+from metrics import AgentMetrics
+from output_monitor import stop_condition, stop_sequences, trim_to_condition
+from prompts import Prompt, estimate_tokens, render as render_prompt
+from ratelimit import (
+    PRIORITY_BULK,
+    PRIORITY_DEFAULT,
+    PRIORITY_INTERACTIVE,
+    CallCancelled,
+    RateLimiter,
+    backoff_delay,
+    retry_after_seconds,
+)
+from similarity import IdeaIndex
+
+
+def get_secret(name, default=None):
+    """Read a setting from the environment, falling back to Streamlit secrets."""
+    value = os.environ.get(name)
+    if value:
+        return value
+    try:
+        import streamlit as st
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
+
+
+# Asset agents run in parallel; cap how many requests are in flight at once
+# and how long (in seconds) a single agent may take before it is abandoned.
+AGENT_CONCURRENCY = 4
+AGENT_TIMEOUT = 120
+
+# LLM_MODEL / LLM_API_BASE can point the agents at another litellm provider
+# or a local OpenAI-compatible server (see bench/).
+LLM_MODEL = get_secret("LLM_MODEL", "groq/llama-3.1-8b-instant")
+LLM_API_BASE = get_secret("LLM_API_BASE")
+
+# Identical prompts are answered from cache instead of being re-sent on every
+# rerun. Set RESPONSE_CACHE_DB to also persist responses on disk.
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 24 * 60 * 60
+
+response_cache = ResponseCache(
+    max_entries=RESPONSE_CACHE_SIZE,
+    ttl=RESPONSE_CACHE_TTL,
+    db_path=get_secret("RESPONSE_CACHE_DB"),
+)
+# Sessions asking for the same prompt at the same time share one provider
+# call instead of each sending their own.
+inflight = InFlight()
+
+# Server-side store of finished assets shared by every session, keyed by the
+# inputs that produced them (see asset_key). Set RESULT_STORE_DB to also keep
+# it on disk across restarts.
+RESULT_STORE_TTL = 7 * 24 * 60 * 60
+
+result_store = ResponseCache(
+    max_entries=RESPONSE_CACHE_SIZE,
+    ttl=RESULT_STORE_TTL,
+    db_path=get_secret("RESULT_STORE_DB"),
+)
+
+
+# Which request inputs each asset agent reads, in argument order. An asset
+# only needs regenerating when one of these changes, so e.g. the audience
+# and financials survive a tone change.
+ASSET_INPUTS = {
+    "tagline": ("name", "idea_summary", "tone"),
+    "pitch": ("name", "idea_summary", "tone"),
+    "audience": ("name", "idea_summary"),
+    "brand": ("name", "idea_summary", "tone"),
+    "website": ("name", "idea_summary", "tone"),
+    "social_media": ("name", "idea_summary", "tone"),
+    "competitor": ("name", "idea_summary"),
+    "financials": ("name", "idea_summary"),
+}
+
+
+def asset_key(key, idea_summary, selected_name, tone):
+    inputs = {"idea_summary": idea_summary, "name": selected_name, "tone": tone}
+    return ResponseCache.make_key(f"asset:{key}", "", {name: inputs[name] for name in ASSET_INPUTS[key]})
+
+
+# Ideas submitted before, for spotting near-duplicates ("mentor matching app
+# for students" vs "app connecting students with mentors") whose summary and
+# names can be offered again instead of paying for both agents. Matches are
+# only offered to the owner (session) that submitted the earlier idea.
+IDEA_SIMILARITY_THRESHOLD = float(get_secret("IDEA_SIMILARITY_THRESHOLD", 0.5))
+idea_index = IdeaIndex(threshold=IDEA_SIMILARITY_THRESHOLD)
+
+# How run_name_generation gets the summary and names: "fused" (one call),
+# "parallel" (two concurrent calls) or "serial" (names from the summary).
+NAME_GENERATION_MODE = get_secret("NAME_GENERATION_MODE", "fused")
+
+
+# Per-agent latency/token/cost records for the debug panel. Set METRICS_LOG
+# to a file path to also append every record there as JSONL.
+agent_metrics = AgentMetrics(log_path=get_secret("METRICS_LOG"))
+
+# Per-agent model settings, merged over MODEL_DEFAULTS. Short agents get
+# tight max_tokens caps so they return quickly. The caps below are starting
+# points sized from the prompts, not measurements; once METRICS_LOG holds
+# CAP_MIN_SAMPLES replies of an agent, its cap is taken from them instead
+# (see recorded_max_tokens). Any agent's model can be overridden with
+# <AGENT>_MODEL, e.g. WEBSITE_MODEL=groq/llama-3.3-70b-versatile. When a
+# model times out or keeps failing, its "fallbacks" are tried in order.
+MODEL_DEFAULTS = {
+    "model": LLM_MODEL,
+    "max_tokens": 1024,
+    "temperature": 0.7,
+    "timeout": None,
+    "fallbacks": [],
+}
+AGENT_MODELS = {
+    "idea": {"max_tokens": 200},
+    "name": {"max_tokens": 60, "temperature": 0.9},
+    "idea_names": {"max_tokens": 260},
+    "tagline": {"max_tokens": 32, "temperature": 0.9},
+    "pitch": {"max_tokens": 450},
+    "audience": {"max_tokens": 450},
+    "brand": {"max_tokens": 450},
+    "social_media": {"max_tokens": 400, "temperature": 0.9},
+    "competitor": {"max_tokens": 600},
+    "financials": {"max_tokens": 500},
+    # Room for every batchable field at its own agent's cap, plus JSON framing.
+    "combined": {"max_tokens": 2800},
+    "website": {"max_tokens": 6000, "timeout": 60, "fallbacks": [LLM_MODEL]},
+}
+CAP_MIN_SAMPLES = 50
+
+
+def recorded_max_tokens(log_path, min_samples=CAP_MIN_SAMPLES):
+    """max_tokens per agent from the replies recorded in a METRICS_LOG file.
+
+    Uses AgentMetrics.summary's suggested_max_tokens (p95 length plus 25%)
+    for agents with at least ``min_samples`` replies. Replies cut off at the
+    old cap count at the cap, so an agent that keeps hitting it gets more.
+    """
+    if not log_path:
+        return {}
+    history = AgentMetrics(max_records=None)
+    history.load(log_path)
+    return {row["agent"]: row["suggested_max_tokens"] for row in history.summary()
+            if row["length_samples"] >= min_samples}
+
+
+_recorded_caps = recorded_max_tokens(get_secret("METRICS_LOG"))
+for _agent, _settings in AGENT_MODELS.items():
+    _settings["model"] = get_secret(f"{_agent.upper()}_MODEL", _settings.get("model", LLM_MODEL))
+    _settings["max_tokens"] = _recorded_caps.get(_agent, _settings["max_tokens"])
+
+
+def agent_settings(agent):
+    settings = dict(MODEL_DEFAULTS)
+    settings.update(AGENT_MODELS.get(agent, {}))
+    # A fallback identical to the primary would only repeat the same failure.
+    settings["fallbacks"] = [model for model in settings["fallbacks"] if model != settings["model"]]
+    return settings
+
+
+def prompt_messages(prompt):
+    """Chat messages for a rendered Prompt (system + user) or a plain prompt string."""
+    if isinstance(prompt, Prompt):
+        return [{"role": "system", "content": prompt.system}, {"role": "user", "content": prompt.user}]
+    return [{"role": "user", "content": prompt}]
+
+
+def prompt_stats(prompt):
+    """Static-prefix, budget-trimmed and compacted token counts for the metrics record."""
+    if isinstance(prompt, Prompt):
+        return {"prefix_tokens": prompt.prefix_tokens, "trimmed_tokens": prompt.trimmed_tokens,
+                "compacted_tokens": prompt.compacted_tokens}
+    return {}
+
+
+def completion_cache_key(prompt, settings):
+    return ResponseCache.make_key(
+        settings["model"],
+        prompt_messages(prompt),
+        {"max_tokens": settings["max_tokens"], "temperature": settings["temperature"]},
+    )
+
+
+# Every session and batch worker shares one budget per model, so concurrent
+# runs queue up instead of tripping provider 429s. Set these to the limits
+# of your account.
+LLM_REQUESTS_PER_MINUTE = int(get_secret("LLM_REQUESTS_PER_MINUTE", 30))
+LLM_TOKENS_PER_MINUTE = int(get_secret("LLM_TOKENS_PER_MINUTE", 20000))
+LLM_MAX_RETRIES = 4
+# Rough completion size charged up front; corrected once usage is known.
+COMPLETION_TOKEN_ESTIMATE = 400
+
+# Name generation is what a user is waiting on; the website is the largest
+# and least urgent request.
+AGENT_PRIORITY = {
+    "idea": PRIORITY_INTERACTIVE,
+    "name": PRIORITY_INTERACTIVE,
+    "idea_names": PRIORITY_INTERACTIVE,
+    "website": PRIORITY_BULK,
+}
+rate_limiter = RateLimiter(LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE)
+
+_priority = threading.local()
+
+
+@contextmanager
+def lowest_priority(cancelled=None):
+    """Send this thread's agent calls at bulk priority, e.g. for speculative work.
+
+    While such a call waits at the rate limiter, ``cancelled()`` is checked;
+    once it returns True the call is dropped unsent (CallCancelled).
+    """
+    _priority.bulk = True
+    _priority.cancelled = cancelled
+    try:
+        yield
+    finally:
+        _priority.bulk = False
+        _priority.cancelled = None
+
+
+def agent_priority(agent):
+    if getattr(_priority, "bulk", False):
+        return PRIORITY_BULK
+    return AGENT_PRIORITY.get(agent, PRIORITY_DEFAULT)
+
+
+# litellm takes seconds to import, so it is loaded on the first LLM call
+# instead of when the app starts.
+@lru_cache(maxsize=1)
+def retryable_errors():
+    from litellm.exceptions import (
+        APIConnectionError,
+        InternalServerError,
+        RateLimitError,
+        ServiceUnavailableError,
+        Timeout,
+    )
+    return (RateLimitError, Timeout, APIConnectionError, ServiceUnavailableError, InternalServerError)
+
+
+def completion_kwargs(model, timeout):
+    # Retries are handled by request_completion, not the provider client.
+    kwargs = {"timeout": timeout, "max_retries": 0}
+    if LLM_API_BASE:
+        kwargs["api_base"] = LLM_API_BASE
+    if LLM_API_BASE or model.startswith("groq/"):
+        kwargs["api_key"] = get_secret("GROQ_API_KEY")
+    return kwargs
+
+
+def usage_cost(usage, model):
+    if not usage:
+        return None
+    from litellm import cost_per_token
+    try:
+        prompt_cost, completion_cost = cost_per_token(
+            model=model,
+            prompt_tokens=usage.get("prompt_tokens", 0) or 0,
+            completion_tokens=usage.get("completion_tokens", 0) or 0,
+        )
+        return prompt_cost + completion_cost
+    except Exception:
+        return None  # model missing from litellm's price map
+
+
+def request_completion(prompt, timeout, agent, settings, attempt_info, **kwargs):
+    """Send one completion through the shared rate limiter.
+
+    Transient provider errors are retried with jittered exponential backoff.
+    If the model times out, or is still failing after the retries, the
+    agent's fallback models are tried in order. ``attempt_info`` is filled
+    with the model used, the retry count and the token estimate charged to
+    the limiter, for the caller's metrics.
+    """
+    from litellm import completion
+    from litellm.exceptions import RateLimitError, Timeout
+
+    messages = prompt_messages(prompt)
+    estimated = sum(estimate_tokens(message["content"]) for message in messages) + min(settings["max_tokens"], COMPLETION_TOKEN_ESTIMATE)
+    priority = agent_priority(agent)
+    timeout = settings["timeout"] or timeout
+    models = [settings["model"]] + settings["fallbacks"]
+    attempt_info.update(retries=0, estimated=estimated)
+    for model_index, model in enumerate(models):
+        has_fallback = model_index < len(models) - 1
+        attempt_info["model"] = model
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            rate_limiter.acquire(model, estimated, priority, cancelled=getattr(_priority, "cancelled", None))
+            try:
+                return completion(
+                    model=model,
+                    messages=messages,
+                    max_tokens=settings["max_tokens"],
+                    temperature=settings["temperature"],
+                    **completion_kwargs(model, timeout),
+                    **kwargs,
+                )
+            except retryable_errors() as e:
+                # A slow model is not retried when there is another to try.
+                if attempt == LLM_MAX_RETRIES or (has_fallback and isinstance(e, Timeout)):
+                    if not has_fallback:
+                        raise
+                    break
+                attempt_info["retries"] += 1
+                delay = backoff_delay(attempt)
+                if isinstance(e, RateLimitError):
+                    # Hold back every caller for this model, not just this one,
+                    # so a 429 doesn't turn into a storm of them.
+                    retry_after = retry_after_seconds(e)
+                    rate_limiter.pause(model, delay if retry_after is None else retry_after + delay / 4)
+                else:
+                    time.sleep(delay)
+
+def settle_usage(usage, attempt_info):
+    if usage:
+        rate_limiter.settle(attempt_info["model"], attempt_info["estimated"], usage.get("total_tokens", 0) or 0)
+
+def run_completion(prompt, timeout: float = AGENT_TIMEOUT, stream: bool = False, agent: str = "completion"):
+    if stream:
+        return stream_completion(prompt, timeout, agent)
+
+    started = time.perf_counter()
+    settings = agent_settings(agent)
+    cache_key = completion_cache_key(prompt, settings)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        agent_metrics.record(agent, started, first_token=time.perf_counter(), cache_hit=True)
+        return cached
+
+    future, leader = inflight.join(cache_key)
+    if not leader:
+        try:
+            content = future.result()
+        except CallCancelled:
+            # The call joined was speculative and has been dropped.
+            return run_completion(prompt, timeout, agent=agent)
+        agent_metrics.record(agent, started, first_token=time.perf_counter(), cache_hit=True)
+        return content
+
+    attempt_info = {}
+    try:
+        response = request_completion(prompt, timeout, agent, settings, attempt_info, **stop_kwargs(agent))
+        choice = response["choices"][0]
+        content = trim_to_condition(agent, choice["message"]["content"].strip())
+    except Exception as e:
+        if not isinstance(e, CallCancelled):
+            agent_metrics.record(agent, started, retries=attempt_info.get("retries", 0), error=str(e))
+        inflight.finish(cache_key, error=e)
+        raise
+    usage = response.get("usage")
+    settle_usage(usage, attempt_info)
+    # Without streaming the first token arrives together with the last one.
+    agent_metrics.record(agent, started, first_token=time.perf_counter(), usage=usage,
+                         cost=usage_cost(usage, attempt_info["model"]), retries=attempt_info["retries"],
+                         model=attempt_info["model"], truncated=choice.get("finish_reason") == "length",
+                         **prompt_stats(prompt))
+    response_cache.set(cache_key, content)
+    inflight.finish(cache_key, content)
+    return content
+
+def stop_kwargs(agent):
+    # Streaming pays a per-chunk cost in the client, so non-streamed calls
+    # are not turned into streams just to be cut; where the provider can
+    # stop at the same place, it is asked to.
+    sequences = stop_sequences(agent)
+    return {"stop": sequences} if sequences else {}
+
+def close_stream(response):
+    """Stop reading a streamed response, dropping the provider connection."""
+    for target in (response, getattr(response, "completion_stream", None)):
+        close = getattr(target, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+# What a cut-off reply is assumed to have had left (a closing paragraph or a
+# couple of list items) while the agent has no full replies to go by.
+EARLY_STOP_TAIL_TOKENS = 100
+
+def early_stop_savings(agent, settings, received_tokens, started, first_token):
+    """Estimated completion tokens and seconds a cut-off reply didn't spend.
+
+    The reply would probably have run to the agent's typical uncut length,
+    within its max_tokens cap, at the rate its tokens were arriving.
+    """
+    expected = agent_metrics.typical_completion_tokens(agent) or received_tokens + EARLY_STOP_TAIL_TOKENS
+    expected = min(expected, settings["max_tokens"])
+    saved_tokens = max(0, expected - received_tokens)
+    elapsed = time.perf_counter() - (first_token or started)
+    per_token = elapsed / received_tokens if received_tokens else 0.0
+    return saved_tokens, saved_tokens * per_token
+
+def stream_completion(prompt, timeout: float = AGENT_TIMEOUT, agent: str = "completion"):
+    """Yield the response text chunk by chunk as the model produces it.
+
+    Agents with a stop condition (see output_monitor.py) are cut off as soon
+    as their reply has the expected shape.
+    """
+    started = time.perf_counter()
+    settings = agent_settings(agent)
+    cache_key = completion_cache_key(prompt, settings)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        agent_metrics.record(agent, started, first_token=time.perf_counter(), cache_hit=True)
+        yield cached
+        return
+
+    future, leader = inflight.join(cache_key)
+    if not leader:
+        # The same prompt is already streaming elsewhere; wait for its text.
+        try:
+            text = future.result()
+        except CallCancelled:
+            yield from stream_completion(prompt, timeout, agent)
+            return
+        agent_metrics.record(agent, started, first_token=time.perf_counter(), cache_hit=True)
+        yield text
+        return
+
+    chunks = []
+    first_token = None
+    usage = None
+    attempt_info = {}
+    monitor = stop_condition(agent)
+    cut = None
+    shown = 0
+    finish_reason = None
+    try:
+        # Only opening the stream is retried; once text has been yielded
+        # a failure is reported as is.
+        response = request_completion(prompt, timeout, agent, settings, attempt_info, **stop_kwargs(agent),
+                                      stream=True, stream_options={"include_usage": True})
+        for chunk in response:
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk["choices"]:
+                continue
+            finish_reason = chunk["choices"][0].get("finish_reason") or finish_reason
+            delta = chunk["choices"][0]["delta"].get("content") or ""
+            if delta:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                if monitor is not None:
+                    # Only text the condition can no longer cut away is shown.
+                    cut = monitor.feed(delta)
+                    delta = monitor.text[shown:cut if cut is not None else max(shown, monitor.settled())]
+                if delta:
+                    chunks.append(delta)
+                    shown += len(delta)
+                    yield delta
+                if cut is not None:
+                    close_stream(response)
+                    break
+        if monitor is not None and cut is None:
+            delta = monitor.text[shown:]
+            if delta:
+                chunks.append(delta)
+                yield delta
+    except GeneratorExit:
+        inflight.finish(cache_key, error=RuntimeError("an identical request was cancelled"))
+        raise
+    except Exception as e:
+        agent_metrics.record(agent, started, first_token=first_token,
+                             retries=attempt_info.get("retries", 0), error=str(e))
+        inflight.finish(cache_key, error=e)
+        raise
+    text = "".join(chunks).strip()
+    saved = {}
+    if cut is not None:
+        # The usage report comes with the last chunk, which was never read.
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in prompt_messages(prompt))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": estimate_tokens(text),
+                 "total_tokens": prompt_tokens + estimate_tokens(text)}
+        saved_tokens, saved_s = early_stop_savings(agent, settings, usage["completion_tokens"], started, first_token)
+        saved = {"stopped_early": True, "saved_tokens": saved_tokens, "saved_s": saved_s}
+    settle_usage(usage, attempt_info)
+    agent_metrics.record(agent, started, first_token=first_token, usage=usage,
+                         cost=usage_cost(usage, attempt_info["model"]), retries=attempt_info["retries"],
+                         model=attempt_info["model"], truncated=finish_reason == "length",
+                         **prompt_stats(prompt), **saved)
+    response_cache.set(cache_key, text)
+    inflight.finish(cache_key, text)
+
+# --- Agents ---
+# Prompt text lives in prompts.py: static instructions go in the system
+# message and only the name, idea and tone vary per call.
+def idea_agent(idea, stream=False):
+    prompt = render_prompt("idea", idea=idea)
+    return run_completion(prompt, stream=stream, agent="idea")
+
+def name_agent(idea, stream=False):
+    prompt = render_prompt("name", idea=idea)
+    return run_completion(prompt, stream=stream, agent="name")
+
+def idea_names_agent(idea):
+    """Summary and startup names in one JSON-structured call (see parse_idea_names)."""
+    prompt = render_prompt("idea_names", idea=idea)
+    return run_completion(prompt, agent="idea_names")
+
+def tagline_agent(name, idea, tone, stream=False):
+    prompt = render_prompt("tagline", name=name, idea=idea, tone=tone)
+    return run_completion(prompt, stream=stream, agent="tagline")
+
+def pitch_agent(name, idea, tone, stream=False):
+    prompt = render_prompt("pitch", name=name, idea=idea, tone=tone)
+    return run_completion(prompt, stream=stream, agent="pitch")
+
+def audience_agent(name, idea, stream=False):
+    prompt = render_prompt("audience", name=name, idea=idea)
+    return run_completion(prompt, stream=stream, agent="audience")
+
+def brand_agent(name, idea, tone, stream=False):
+    prompt = render_prompt("brand", name=name, idea=idea, tone=tone)
+    return run_completion(prompt, stream=stream, agent="brand")
+
+def website_agent(name, idea, tone, stream=False):
+    prompt = render_prompt("website", name=name, idea=idea, tone=tone)
+    return run_completion(prompt, stream=stream, agent="website")
+
+def social_media_agent(name, idea, tone, stream=False):
+    prompt = render_prompt("social_media", name=name, idea=idea, tone=tone)
+    return run_completion(prompt, stream=stream, agent="social_media")
+
+def competitor_analysis_agent(name, idea, stream=False):
+    prompt = render_prompt("competitor", name=name, idea=idea)
+    return run_completion(prompt, stream=stream, agent="competitor")
+
+def financials_agent(name, idea, stream=False):
+    prompt = render_prompt("financials", name=name, idea=idea)
+    return run_completion(prompt, stream=stream, agent="financials")
+
+# --- Combined generation ---
+# Short assets that can be requested together in one JSON-structured call
+# instead of resending the same framing and idea summary once per agent.
+COMBINED_FIELDS = {
+    "tagline": "a catchy and memorable tagline, under 10 words",
+    "audience": "bullet points grouped under Primary Target Audience, Secondary Target Audience and Pain Points",
+    "brand": "a professional color palette (primary and secondary colors with hex codes) and a logo concept describing style and symbolism",
+    "social_media": "a numbered list of 5 short, engaging social media post ideas for platforms like Twitter or Instagram",
+    "competitor": "a brief competitor analysis in clear paragraphs covering key competitors, differentiation and potential market challenges",
+    "financials": "a simple 3-year financial projection outline in bullet points covering revenue streams, key costs and profit estimates",
+}
+
+def combined_agent(name, idea, tone, fields):
+    field_lines = "\n".join(f'- "{field}": {COMBINED_FIELDS[field]}' for field in fields)
+    prompt = render_prompt("combined", name=name, idea=idea, tone=tone, extra=f"Assets (JSON keys):\n{field_lines}")
+    return run_completion(prompt, agent="combined")
+
+def format_combined_value(value, numbered=False):
+    """Normalize one JSON value into the plain text the tabs expect, or None if malformed."""
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, list) and value and all(isinstance(item, str) for item in value):
+        if numbered:
+            return "\n".join(f"{i}. {item.strip()}" for i, item in enumerate(value, 1))
+        return "\n".join(f"- {item.strip()}" for item in value)
+    if isinstance(value, dict) and value:
+        sections = []
+        for heading, items in value.items():
+            body = format_combined_value(items)
+            if body is None:
+                return None
+            sections.append(f"**{heading}**\n{body}")
+        return "\n\n".join(sections)
+    return None
+
+def parse_combined_response(text, fields):
+    """Return the fields of a combined_agent reply that parsed and validated.
+
+    Anything missing or malformed is left out so the caller can fall back to
+    the individual agent for it.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    parsed = {}
+    for field in fields:
+        value = format_combined_value(data.get(field), numbered=field == "social_media")
+        if value is not None:
+            parsed[field] = value
+    return parsed
+
+def combinable_fields(selected, combined):
+    if not combined:
+        return []
+    fields = [key for key in selected if key in COMBINED_FIELDS]
+    # A single short asset gains nothing from the JSON wrapper.
+    return fields if len(fields) > 1 else []
+
+# --- Report generator ---
+def report_agent(name, tagline, pitch, audience, brand, idea_summary):
+    if "." in pitch:
+        problem = pitch.split(".", 1)[0] + "."
+        solution = pitch.split(".", 1)[1].strip()
+    else:
+        problem = pitch
+        solution = ""
+    return {
+        "name": name,
+        "tagline": tagline,
+        "pitch": pitch,
+        "audience": audience,
+        "problem": problem,
+        "solution": solution,
+        "brand": brand,
+        "idea_summary": idea_summary,
+    }
+
+# --- Workflow split into parts ---
+def parse_idea_names(text):
+    """Return (summary, numbered names text) from an idea_names_agent reply, or None if malformed."""
+    parsed = parse_combined_response(text, ["summary", "names"])
+    names = parse_names(parsed.get("names", ""))
+    if "summary" not in parsed or not names:
+        return None
+    return parsed["summary"], "\n".join(f"{i}. {name}" for i, name in enumerate(names, 1))
+
+def run_name_generation(idea, mode=None, owner=None):
+    """Return (idea_summary, names_text) for a raw idea, indexed under ``owner``.
+
+    "fused" asks for both in one call and falls back to "parallel" if the
+    reply doesn't parse; "parallel" names the raw idea while it is being
+    summarized; "serial" names the finished summary (two round-trips).
+    """
+    mode = mode or NAME_GENERATION_MODE
+    result = None
+    if mode == "fused":
+        try:
+            result = parse_idea_names(idea_names_agent(idea))
+        except Exception:
+            result = None
+        if result is None:
+            mode = "parallel"
+    if result is None and mode == "parallel":
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            summary_future = pool.submit(idea_agent, idea)
+            names_future = pool.submit(name_agent, idea)
+            result = summary_future.result(), names_future.result()
+    if result is None:
+        idea_summary = idea_agent(idea)
+        result = idea_summary, name_agent(idea_summary)
+    idea_index.add(idea, result, owner=owner)
+    return result
+
+# Numbered ("1.", "10)", "(2)") or bulleted list items.
+NAME_LIST_RE = re.compile(r"^\s*(?:\(?\d+[.):]|[-*\u2022])\s*(.+)$", re.MULTILINE)
+# Emphasis opening a line ("**1. Mentora**"); a "* " bullet has a space after it.
+LEADING_EMPHASIS_RE = re.compile(r"^(\s*)[*_]+(?=\S)", re.MULTILINE)
+
+def clean_name(text):
+    text = re.sub(r"[*_`\"]+", "", text).strip()
+    # Drop any explanation after the name ("Mentora - a platform ...").
+    text = re.split(r"\s+[-\u2013\u2014]\s+|:\s|\s\(", text, maxsplit=1)[0]
+    return text.strip(" .,;:")
+
+def parse_names(names_text):
+    """Names from a numbered or bulleted list; one name per short line if there is no list."""
+    names_text = LEADING_EMPHASIS_RE.sub(r"\1", names_text)
+    items = NAME_LIST_RE.findall(names_text)
+    if not items:
+        parts = [part for line in names_text.splitlines() for part in line.split(",")]
+        # Lead-ins like "Here are some names:" are not names.
+        items = [part for part in parts if 0 < len(part.split()) <= 4 and not part.strip().endswith(":")]
+    name_options = []
+    for item in items:
+        name = clean_name(item)
+        if name and name not in name_options:
+            name_options.append(name)
+    return name_options
+
+def select_agents(idea_summary, selected_name, tone, generate_flags):
+    agents = {
+        "tagline": tagline_agent,
+        "pitch": pitch_agent,
+        "audience": audience_agent,
+        "brand": brand_agent,
+        "website": website_agent,
+        "social_media": social_media_agent,
+        "competitor": competitor_analysis_agent,
+        "financials": financials_agent,
+    }
+    inputs = {"idea_summary": idea_summary, "name": selected_name, "tone": tone}
+    return {
+        key: (fn, tuple(inputs[name] for name in ASSET_INPUTS[key]))
+        for key, fn in agents.items()
+        if generate_flags.get(key, False)
+    }
+
+def run_agent(key, idea_summary, selected_name, tone, stream=False):
+    """Run a single asset agent by its result key (e.g. "pitch")."""
+    fn, args = select_agents(idea_summary, selected_name, tone, {key: True})[key]
+    return fn(*args, stream=stream)
+
+def finish_generation(results, idea_summary, selected_name):
+    results.update(report_agent(
+        selected_name,
+        results.get('tagline', ''),
+        results.get('pitch', ''),
+        results.get('audience', ''),
+        results.get('brand', ''),
+        idea_summary,
+    ))
+    return results
+
+def run_full_generation(idea_summary, selected_name, tone, generate_flags,
+                        max_workers=AGENT_CONCURRENCY, timeout=AGENT_TIMEOUT, combined=False, executor=None):
+    selected = select_agents(idea_summary, selected_name, tone, generate_flags)
+    batched = combinable_fields(selected, combined)
+
+    results = {}
+
+    def collect(futures):
+        for key, future in futures.items():
+            try:
+                results[key] = future.result(timeout=timeout)
+            except Exception as e:
+                results[key] = f"error: {str(e)}"
+
+    if selected:
+        # Each agent is an independent blocking call, so the whole run takes
+        # roughly as long as the slowest one instead of the sum of all of them.
+        # A shared executor (see service.py) bounds the work across sessions.
+        pool = executor or ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(selected))))
+        futures = {key: pool.submit(fn, *args) for key, (fn, args) in selected.items() if key not in batched}
+        if batched:
+            combined_future = pool.submit(combined_agent, selected_name, idea_summary, tone, batched)
+        try:
+            if batched:
+                # The combined reply is short; its fallbacks start as soon as
+                # it is parsed, alongside the slower agents still running.
+                try:
+                    results.update(parse_combined_response(combined_future.result(timeout=timeout), batched))
+                except Exception:
+                    pass
+                futures.update({
+                    key: pool.submit(fn, *args)
+                    for key, (fn, args) in selected.items()
+                    if key in batched and key not in results
+                })
+            collect(futures)
+        finally:
+            # Don't block the page on an agent that already blew its timeout.
+            if executor is None:
+                pool.shutdown(wait=False)
+    return finish_generation(results, idea_summary, selected_name)
+
+def stream_full_generation(idea_summary, selected_name, tone, generate_flags,
+                           max_workers=AGENT_CONCURRENCY, timeout=AGENT_TIMEOUT, combined=False, executor=None):
+    """Run the selected agents concurrently, yielding (key, text_so_far, done)
+    every time one of them produces more output."""
+    selected = select_agents(idea_summary, selected_name, tone, generate_flags)
+    if not selected:
+        return
+
+    events = queue.Queue()
+
+    def pump(key, fn, args):
+        text = ""
+        try:
+            for chunk in fn(*args, stream=True):
+                text += chunk
+                events.put((key, text, False))
+        except Exception as e:
+            text = f"error: {str(e)}"
+        events.put((key, text.strip(), True))
+
+    def pump_combined(keys):
+        # The JSON reply can't be shown half-written, so each field is
+        # emitted once parsed; missing or malformed fields stream from
+        # their own agent instead.
+        try:
+            parsed = parse_combined_response(combined_agent(selected_name, idea_summary, tone, keys), keys)
+        except Exception:
+            parsed = {}
+        for key in keys:
+            if key in parsed:
+                events.put((key, parsed[key], True))
+                continue
+            fn, args = selected[key]
+            try:
+                pool.submit(pump, key, fn, args)
+            except RuntimeError:
+                # The pool was shut down because the caller stopped reading.
+                events.put((key, "error: generation was stopped", True))
+
+    batched = combinable_fields(selected, combined)
+    pool = executor or ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(selected))))
+    for key, (fn, args) in selected.items():
+        if key not in batched:
+            pool.submit(pump, key, fn, args)
+    if batched:
+        pool.submit(pump_combined, batched)
+    pending = set(selected)
+    try:
+        while pending:
+            try:
+                key, text, done = events.get(timeout=timeout)
+            except queue.Empty:
+                for key in sorted(pending):
+                    yield key, "error: timed out", True
+                break
+            if done:
+                pending.discard(key)
+            yield key, text, done
+    finally:
+        if executor is None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,251 @@
+from collections import namedtuple
+
+# Each agent's static instructions form its system message; only the user
+# message (name, idea, tone) varies between calls. A provider with prompt
+# caching can reuse the system message, but OpenAI-style caches only start
+# at 1024 prompt tokens, which none of these reach, so the savings reported
+# are against the prompts used before templates (PREVIOUS_STATIC_TOKENS).
+Prompt = namedtuple("Prompt", ["system", "user", "prefix_tokens", "trimmed_tokens", "compacted_tokens"])
+
+# Estimated tokens of each agent's prompt before templates, with the name,
+# idea and tone left empty.
+PREVIOUS_STATIC_TOKENS = {
+    "idea": 86,
+    "name": 75,
+    "tagline": 70,
+    "pitch": 84,
+    "audience": 88,
+    "brand": 95,
+    "website": 643,
+    "social_media": 79,
+    "competitor": 83,
+    "financials": 79,
+    "combined": 110,
+}
+
+# Labels for the per-call values, in the order they appear in the user message.
+REQUEST_FIELDS = (
+    ("name", "Startup name"),
+    ("idea", "Startup idea"),
+    ("tone", "Tone"),
+)
+
+# Upper bound on input tokens per agent. Static instructions always fit; an
+# overlong idea is trimmed so the request stays within the budget.
+DEFAULT_PROMPT_BUDGET = 1024
+PROMPT_BUDGETS = {
+    "website": 1536,
+    "combined": 1536,
+}
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), good enough for budgets."""
+    return (len(text) + 3) // 4
+
+
+def compact(text):
+    """Drop trailing whitespace and repeated blank lines; indentation is kept."""
+    lines = []
+    for line in text.strip().splitlines():
+        line = line.rstrip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def trim_words(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[:max(0, max_tokens * 4 - 4)]
+    return cut.rsplit(" ", 1)[0] + " ..."
+
+
+class PromptTemplate:
+    """Static instructions for one agent plus the values it fills in per call.
+
+    Token counts of the static part are computed once, when the template is
+    defined. ``render`` returns a Prompt whose system message is identical
+    for every call of the agent.
+    """
+
+    def __init__(self, agent, instructions, fields, budget=None):
+        self.agent = agent
+        self.fields = fields
+        self.system = compact(instructions)
+        self.budget = budget or PROMPT_BUDGETS.get(agent, DEFAULT_PROMPT_BUDGET)
+        self.system_tokens = estimate_tokens(self.system)
+        if self.system_tokens >= self.budget:
+            raise ValueError(f"{agent} instructions ({self.system_tokens} tokens) exceed the {self.budget} budget")
+        # Static tokens per call: the instructions plus the value labels.
+        self.static_tokens = self.system_tokens + estimate_tokens(self.user_message(dict.fromkeys(fields, "")))
+        previous = PREVIOUS_STATIC_TOKENS.get(agent)
+        self.compacted_tokens = previous - self.static_tokens if previous is not None else 0
+
+    def user_message(self, values, extra=""):
+        lines = []
+        for field, label in REQUEST_FIELDS:
+            if field in self.fields:
+                value = str(values[field]).strip()
+                lines.append(f"{label}:\n{value}" if field == "idea" else f"{label}: {value}")
+        if extra:
+            lines.append(extra)
+        return "\n\n".join(lines)
+
+    def render(self, extra="", **values):
+        user = self.user_message(values, extra)
+        trimmed = 0
+        overflow = self.system_tokens + estimate_tokens(user) - self.budget
+        if overflow > 0 and "idea" in self.fields:
+            # The idea is the only unbounded value; shorten it to fit.
+            idea_tokens = estimate_tokens(values["idea"])
+            values = dict(values, idea=trim_words(values["idea"], max(16, idea_tokens - overflow)))
+            user = self.user_message(values, extra)
+            trimmed = idea_tokens - estimate_tokens(values["idea"])
+        return Prompt(self.system, user, self.system_tokens, trimmed, self.compacted_tokens)
+
+    def describe(self):
+        return {
+            "agent": self.agent,
+            "static_tokens": self.static_tokens,
+            "previous_static_tokens": PREVIOUS_STATIC_TOKENS.get(self.agent),
+            "budget": self.budget,
+        }
+
+
+TEMPLATES = {}
+
+
+def template(agent, fields, instructions):
+    TEMPLATES[agent] = PromptTemplate(agent, instructions, fields)
+    return TEMPLATES[agent]
+
+
+def render(agent, **values):
+    return TEMPLATES[agent].render(**values)
+
+
+template("idea", ("idea",), """
+You are a seasoned startup strategist.
+
+Summarize the startup idea in 2-3 compelling sentences that identify the main problem it addresses and its core solution.
+
+Output only the summary.
+""")
+
+template("name", ("idea",), """
+Generate exactly 3 unique startup names for the idea: easy to pronounce, SEO friendly, avoiding generic words like "AI" and "Tech".
+
+Output only the names as a numbered list, without explanations or pronunciation guides.
+""")
+
+template("idea_names", ("idea",), """
+You are a seasoned startup strategist and naming expert.
+
+For the startup idea, return only a JSON object, without code fences or other text, with exactly two keys:
+- "summary": 2-3 sentences identifying the main problem it addresses and its core solution
+- "names": a list of 3 unique startup names, easy to pronounce, SEO friendly, avoiding generic words like "AI" and "Tech", without explanations or pronunciation guides
+""")
+
+template("tagline", ("name", "idea", "tone"), """
+You are an expert copywriter.
+
+Write a catchy, memorable tagline for the startup in the given tone, under 10 words.
+
+Output only the tagline.
+""")
+
+template("pitch", ("name", "idea", "tone"), """
+You are a skilled marketer.
+
+Write a compelling two-paragraph elevator pitch for the startup in the given tone, covering:
+- The problem and its impact
+- The solution and its unique value proposition
+
+Output only the pitch.
+""")
+
+template("audience", ("name", "idea"), """
+You are a market analyst.
+
+Define the startup's target audience and their pain points as concise bullet points grouped under:
+- Primary Target Audience
+- Secondary Target Audience
+- Pain Points
+
+Output only the bullet points.
+""")
+
+template("brand", ("name", "idea", "tone"), """
+You are a branding expert.
+
+Suggest a professional color palette (with hex codes) and a simple, effective logo concept for the startup, suited to the given tone. Describe:
+- Primary and secondary colors
+- Logo style and symbolism
+
+Output only these descriptions.
+""")
+
+template("website", ("name", "idea", "tone"), """
+You are a front-end web developer and UI/UX designer.
+
+Build a modern, responsive single-page website for the startup in vanilla HTML, CSS and JavaScript (no frameworks or libraries).
+
+HTML:
+- Semantic HTML5 with ARIA attributes and alt text.
+- Head: SEO title and description reflecting the name and tone, Google Fonts Poppins (headings) and Roboto (body), style.css and script.js.
+- Sections: hero (name as a large heading, tagline below, centered call-to-action); about (the problem solved); features (3+ cards); services (4+); testimonials (3, with name, placeholder photo and quote); contact form (Name, Email, Message, all required, and a submit button).
+- Each feature and service has an emoji or inline SVG icon, a title and a short description.
+
+CSS:
+- Centered layout with Grid and Flexbox, consistent spacing, readable sizes and clear hierarchy.
+- Sticky header whose background changes smoothly on scroll; sections fade in on scroll.
+- Rounded buttons with subtle shadows and hover/focus states.
+
+JavaScript:
+- Smooth scrolling for internal links.
+- Contact form validation (required fields, email format) with inline error messages.
+- Subtle scroll-triggered animations.
+
+Make it detailed, polished, accessible and mobile-friendly.
+
+Output exactly three fenced code blocks labeled html, css and javascript, with no text outside them.
+""")
+
+template("social_media", ("name", "idea", "tone"), """
+You are a social media strategist.
+
+Write 5 short, engaging social media post ideas for the startup in the given tone, suitable for platforms like Twitter or Instagram.
+
+Output only a numbered list.
+""")
+
+template("competitor", ("name", "idea"), """
+You are a business analyst.
+
+Write a brief competitor analysis for the startup in clear, concise paragraphs covering:
+- Key competitors
+- What differentiates this startup
+- Potential market challenges
+
+Output only the analysis.
+""")
+
+template("financials", ("name", "idea"), """
+You are a financial advisor.
+
+Outline a simple 3-year financial projection for the startup as concise bullet points covering expected:
+- Revenue streams
+- Key costs
+- Profit estimates
+
+Output only the outline.
+""")
+
+template("combined", ("name", "idea", "tone"), """
+You are a startup strategist, copywriter, branding expert and business analyst.
+
+Create the assets listed after the startup details, using the given tone for the tagline, brand direction and social media posts.
+
+Return only a JSON object with exactly the listed keys, without code fences or other text. Every value is a string; use "\\n" for line breaks inside a value.
+""")
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# Lower numbers are scheduled first when callers queue for the same model.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BULK = 2
+# How often a cancellable caller waiting in ``acquire`` checks whether it is
+# still wanted.
+CANCEL_CHECK_INTERVAL = 0.5
+
+
+class CallCancelled(Exception):
+    """Raised by ``RateLimiter.acquire`` when a waiting call is no longer wanted."""
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # Never ask for more than a full bucket, or a large request would
+        # wait forever.
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+class RateLimiter:
+    """Shared requests/min and tokens/min budget per model.
+
+    Callers block in ``acquire`` until the budget allows their request. When
+    several callers wait on the same model, the lowest priority value goes
+    first, in arrival order within a priority.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._models = {}
+        self._cond = threading.Condition()
+        self._order = itertools.count()
+
+    def _state(self, model):
+        state = self._models.get(model)
+        if state is None:
+            state = {
+                "requests": TokenBucket(self.requests_per_minute),
+                "tokens": TokenBucket(self.tokens_per_minute),
+                "waiting": [],
+                "paused_until": 0.0,
+            }
+            self._models[model] = state
+        return state
+
+    def acquire(self, model, tokens, priority=PRIORITY_DEFAULT, cancelled=None):
+        """Block until ``tokens`` (an estimate) may be sent to ``model``.
+
+        ``cancelled`` is an optional callable; once it returns True the call
+        gives up its place and CallCancelled is raised, without using any of
+        the budget.
+        """
+        with self._cond:
+            state = self._state(model)
+            ticket = (priority, next(self._order))
+            heapq.heappush(state["waiting"], ticket)
+            try:
+                while True:
+                    if cancelled is not None and cancelled():
+                        raise CallCancelled()
+                    now = time.monotonic()
+                    state["requests"].refill(now)
+                    state["tokens"].refill(now)
+                    delay = max(
+                        state["paused_until"] - now,
+                        state["requests"].wait_time(1),
+                        state["tokens"].wait_time(tokens),
+                    )
+                    if state["waiting"][0] == ticket and delay <= 0:
+                        state["requests"].level -= 1
+                        state["tokens"].level -= min(tokens, state["tokens"].capacity)
+                        return
+                    if cancelled is not None:
+                        delay = min(delay, CANCEL_CHECK_INTERVAL) if delay > 0 else CANCEL_CHECK_INTERVAL
+                    self._cond.wait(timeout=delay if delay > 0 else None)
+            finally:
+                state["waiting"].remove(ticket)
+                heapq.heapify(state["waiting"])
+                self._cond.notify_all()
+
+    def settle(self, model, estimated, actual):
+        """Correct the token budget once the real usage is known."""
+        if not actual:
+            return
+        with self._cond:
+            self._state(model)["tokens"].level -= actual - estimated
+            self._cond.notify_all()
+
+    def pause(self, model, seconds):
+        """Hold every caller for ``model`` back, e.g. after a 429 with Retry-After."""
+        with self._cond:
+            state = self._state(model)
+            state["paused_until"] = max(state["paused_until"], time.monotonic() + seconds)
+            self._cond.notify_all()
+
+
+def retry_after_seconds(error):
+    """Read a Retry-After header (in seconds) off a provider error, if it has one."""
+    candidates = (
+        getattr(error, "litellm_response_headers", None),
+        getattr(getattr(error, "response", None), "headers", None),
+    )
+    for headers in candidates:
+        if not headers:
+            continue
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
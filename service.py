@@ -0,0 +1,157 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import (
+    CallCancelled,
+    agent_settings,
+    asset_key,
+    get_secret,
+    inflight,
+    lowest_priority,
+    result_store,
+    run_agent,
+    run_full_generation,
+    stream_full_generation,
+)
+from prompts import estimate_tokens, render as render_prompt
+
+# Upper bound on agent calls running at once across all sessions of one
+# app process.
+SERVICE_WORKERS = int(get_secret("SERVICE_WORKERS", 16))
+
+# Cheap, name-dependent assets started while the user is still choosing a
+# name, and the most tokens (prompt + max completion) one idea may spend on
+# them. Both assets are estimated at about 700 tokens per name with a
+# two-sentence summary, so the default covers all three candidates; a much
+# longer summary leaves the last pitch out. 0 turns prefetching off.
+PREFETCH_ASSETS = ("tagline", "pitch")
+PREFETCH_TOKEN_BUDGET = int(get_secret("PREFETCH_TOKEN_BUDGET", 2500))
+
+
+class GenerationService:
+    """Worker pool and result cache shared by every session of the app.
+
+    Create one per process (app.py does this with ``st.cache_resource``).
+    Agent calls from all sessions run on the same bounded pool, finished
+    assets go to one shared store, and identical prompts that are in flight
+    at the same time are coalesced by ``pipeline.inflight``, so many users
+    submitting the same idea cost one set of provider calls.
+    """
+
+    def __init__(self, max_workers=SERVICE_WORKERS, results=result_store):
+        self.max_workers = max_workers
+        self.results = results
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pitchcraft")
+
+    def run_full_generation(self, idea_summary, selected_name, tone, generate_flags, **kwargs):
+        return run_full_generation(idea_summary, selected_name, tone, generate_flags, executor=self.pool, **kwargs)
+
+    def stream_full_generation(self, idea_summary, selected_name, tone, generate_flags, **kwargs):
+        return stream_full_generation(idea_summary, selected_name, tone, generate_flags, executor=self.pool, **kwargs)
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "in_flight": len(inflight),
+            "coalesced": inflight.coalesced,
+            "stored_results": self.results.stats()["entries"],
+        }
+
+
+class Prefetch:
+    """Speculative tagline/pitch generation for the candidate names of one idea.
+
+    ``submit`` queues the prefetch assets for a name on the service pool as
+    long as the token budget allows, most likely name first. Results go to
+    the shared result store under the same ``asset_key`` a normal generation
+    looks up, so finalizing a prefetched name finds them ready; a call still
+    running is joined through ``pipeline.inflight``. Calls run at bulk
+    priority, behind real requests.
+
+    Once a name is chosen, calls for the other names are dropped before they
+    are sent: queued ones are cancelled and ones waiting at the rate limiter
+    give up their place (``stats()["dropped"]``), and their tokens go back
+    to the budget. A call the limiter already let through runs to completion
+    and is paid for; ``stats()["unused"]`` counts those.
+    """
+
+    def __init__(self, service, idea_summary, tone, budget=PREFETCH_TOKEN_BUDGET, assets=PREFETCH_ASSETS):
+        self.service = service
+        self.idea_summary = idea_summary
+        self.tone = tone
+        self.budget = budget
+        self.assets = assets
+        self.spent = 0
+        self.submitted = 0
+        self.cancelled = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.chosen = None
+        self._jobs = {}  # (name, key) -> (future, estimated tokens)
+        self._lock = threading.Lock()
+
+    def estimate(self, key, name):
+        prompt = render_prompt(key, name=name, idea=self.idea_summary, tone=self.tone)
+        return estimate_tokens(prompt.system + prompt.user) + agent_settings(key)["max_tokens"]
+
+    def submit(self, name):
+        """Queue the prefetch assets for ``name`` that fit in the remaining budget."""
+        with self._lock:
+            for key in self.assets:
+                if (name, key) in self._jobs:
+                    continue
+                cost = self.estimate(key, name)
+                if self.spent + cost > self.budget:
+                    self.skipped += 1
+                    continue
+                self.spent += cost
+                self.submitted += 1
+                self._jobs[(name, key)] = (self.service.pool.submit(self._run, key, name), cost)
+
+    def _run(self, key, name):
+        memo_key = asset_key(key, self.idea_summary, name, self.tone)
+        if self.service.results.get(memo_key) is not None:
+            return
+        # Speculative calls queue behind real requests at the rate limiter,
+        # and are dropped there if another name is chosen in the meantime.
+        try:
+            with lowest_priority(cancelled=lambda: self.chosen not in (None, name)):
+                text = run_agent(key, self.idea_summary, name, self.tone).strip()
+        except CallCancelled:
+            with self._lock:
+                _, cost = self._jobs.pop((name, key))
+                self.spent -= cost
+                self.dropped += 1
+            return
+        if text and not text.startswith("error:"):
+            self.service.results.set(memo_key, text)
+
+    def cancel_others(self, name):
+        """Cancel queued work for every name but ``name``; started calls run to completion."""
+        with self._lock:
+            self.chosen = name
+            for (other, key), (future, cost) in list(self._jobs.items()):
+                if other != name and future.cancel():
+                    del self._jobs[(other, key)]
+                    self.spent -= cost
+                    self.cancelled += 1
+
+    def focus(self, name):
+        """Give the budget to ``name``, e.g. when the user selects it."""
+        self.cancel_others(name)
+        self.submit(name)
+
+    def stats(self):
+        with self._lock:
+            running = sum(not future.done() for future, _ in self._jobs.values())
+            unused = sum(name != self.chosen for name, _ in self._jobs) if self.chosen is not None else 0
+        return {
+            "budget": self.budget,
+            "spent_tokens": self.spent,
+            "submitted": self.submitted,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+            "unused": unused,
+            "skipped": self.skipped,
+            "pending": running,
+        }
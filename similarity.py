@@ -0,0 +1,137 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+IdeaMatch = namedtuple("IdeaMatch", ["idea", "score", "value"])
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and app application are as at be based by for from help helps in into is it its
+of on or platform service that the their them to tool use users using which who with
+""".split())
+
+
+def stem(word):
+    """Very light suffix stripping, so "mentors"/"mentor" and "matching"/"match" agree."""
+    if len(word) <= 4:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def idea_terms(text):
+    return Counter(stem(word) for word in TOKEN_RE.findall(text.lower()) if word not in STOPWORDS)
+
+
+class IdeaIndex:
+    """In-memory TF-IDF index of submitted ideas for near-duplicate lookups.
+
+    Ideas are compared by cosine similarity of their TF-IDF term vectors;
+    only ideas sharing at least one term with the query are scored, via an
+    inverted index. Needs no model download or network access. Matched and
+    re-added ideas count as recently used; the least recently used ones are
+    dropped once ``max_entries`` is reached. Adding an idea that is already
+    indexed (ignoring case and spacing) replaces its value.
+
+    Ideas are added under an ``owner`` (e.g. a session) and a lookup only
+    matches ideas of the same owner. Term weights are shared: swapping one
+    key word ("tutors" for "mentors") scores like a rewording, so a match
+    may be a different idea and must not reveal someone else's results.
+    """
+
+    def __init__(self, threshold=0.5, max_entries=2000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.lookups = 0
+        self.hits = 0
+        self.lookup_seconds = 0.0
+        self._entries = OrderedDict()  # id -> (idea, term counts, value, owner)
+        self._postings = {}  # term -> set of ids
+        self._ids = {}  # (owner, normalized idea) -> id
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _idf(self, term):
+        # Smoothed, so a term in every idea still carries some weight.
+        return math.log((1 + len(self._entries)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _vector(self, terms):
+        vector = {term: count * self._idf(term) for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return vector, norm
+
+    def lookup(self, idea, threshold=None, owner=None):
+        """Return the owner's most similar indexed idea as an IdeaMatch, or None below the threshold."""
+        threshold = self.threshold if threshold is None else threshold
+        started = time.perf_counter()
+        terms = idea_terms(idea)
+        best = None
+        with self._lock:
+            candidates = set()
+            for term in terms:
+                candidates.update(self._postings.get(term, ()))
+            if candidates:
+                query, query_norm = self._vector(terms)
+                for entry_id in candidates:
+                    other_idea, other_terms, value, other_owner = self._entries[entry_id]
+                    if other_owner != owner:
+                        continue
+                    vector, norm = self._vector(other_terms)
+                    dot = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+                    score = dot / (query_norm * norm) if query_norm and norm else 0.0
+                    if best is None or score > best.score:
+                        best, best_id = IdeaMatch(other_idea, score, value), entry_id
+            self.lookups += 1
+            if best is not None and best.score >= threshold:
+                self.hits += 1
+                self._entries.move_to_end(best_id)
+            else:
+                best = None
+            self.lookup_seconds += time.perf_counter() - started
+        return best
+
+    def add(self, idea, value, owner=None):
+        terms = idea_terms(idea)
+        if not terms:
+            return
+        key = (owner, " ".join(idea.lower().split()))
+        with self._lock:
+            entry_id = self._ids.get(key)
+            if entry_id is not None:
+                self._entries[entry_id] = (idea, terms, value, owner)
+                self._entries.move_to_end(entry_id)
+                return
+            entry_id = self._next_id
+            self._next_id += 1
+            self._ids[key] = entry_id
+            self._entries[entry_id] = (idea, terms, value, owner)
+            for term in terms:
+                self._postings.setdefault(term, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                old_id, (old_idea, old_terms, _, old_owner) = self._entries.popitem(last=False)
+                del self._ids[(old_owner, " ".join(old_idea.lower().split()))]
+                for term in old_terms:
+                    ids = self._postings[term]
+                    ids.discard(old_id)
+                    if not ids:
+                        del self._postings[term]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "mean_lookup_ms": 1000 * self.lookup_seconds / self.lookups if self.lookups else 0.0,
+            }
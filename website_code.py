@@ -0,0 +1,190 @@
+import re
+from collections import namedtuple
+
+WebsiteParts = namedtuple("WebsiteParts", ["html", "css", "js"])
+
+FENCE = "```"
+LANGUAGES = {
+    "html": "html",
+    "htm": "html",
+    "xml": "html",
+    "css": "css",
+    "scss": "css",
+    "js": "js",
+    "javascript": "js",
+    "jsx": "js",
+}
+
+
+JS_START_RE = re.compile(
+    r"(?:const|let|var|function|class|import|export|async|await|document|window|if|for|while|return|new)\b"
+    r"|//|[('\"`]"
+)
+BRACKETED_RE = re.compile(r"\[[^\[\]]*\]|\([^()]*\)")
+
+
+def guess_language(body):
+    """Classify an unlabeled code block from how it starts.
+
+    CSS starts with a selector or at-rule followed by ``{`` and a
+    declaration. Attribute selectors and pseudo-classes
+    (``input[type="email"]``, ``li:nth-child(2n)``) are dropped before the
+    selector is checked for ``=``, ``;`` or parentheses left over from JS
+    such as ``form.addEventListener('submit', e => {``.
+    """
+    stripped = CSS_COMMENT_RE.sub("", body).lstrip()
+    if stripped.startswith("<"):
+        return "html"
+    if JS_START_RE.match(stripped):
+        return "js"
+    selector, brace, rest = stripped[:200].partition("{")
+    if not brace or ":" not in rest:
+        return "js"
+    if selector.startswith("@"):
+        return "css"
+    previous = None
+    while previous != selector:
+        previous, selector = selector, BRACKETED_RE.sub("", selector)
+    return "js" if re.search(r"[=;()\[\]]", selector) else "css"
+
+
+class FencedBlockParser:
+    """Single-pass parser for the fenced code blocks in a model reply.
+
+    Text can be fed in arbitrary chunks (e.g. straight from a stream); every
+    line is looked at exactly once. ``feed`` returns the parts whose block
+    has just closed, so callers can act on the HTML before the CSS and JS
+    have arrived.
+    """
+
+    def __init__(self):
+        self.parts = {"html": None, "css": None, "js": None}
+        self._pending = ""
+        self._language = None
+        self._lines = None
+
+    def feed(self, chunk):
+        self._pending += chunk
+        if "\n" not in chunk:
+            return []
+        *lines, self._pending = self._pending.split("\n")
+        completed = []
+        for line in lines:
+            done = self._line(line)
+            if done:
+                completed.append(done)
+        return completed
+
+    def close(self):
+        """Finish parsing; an unterminated last block (a cut-off reply) still counts."""
+        completed = []
+        if self._pending:
+            done = self._line(self._pending)
+            self._pending = ""
+            if done:
+                completed.append(done)
+        if self._lines is not None:
+            done = self._finish_block()
+            if done:
+                completed.append(done)
+        return completed
+
+    def _line(self, line):
+        stripped = line.strip()
+        if self._lines is None:
+            if stripped.startswith(FENCE):
+                label = stripped[len(FENCE):].strip().lower()
+                self._language = LANGUAGES.get(label.split()[0] if label else "")
+                self._lines = []
+            return None
+        if stripped.startswith(FENCE):
+            return self._finish_block()
+        self._lines.append(line)
+        return None
+
+    def _finish_block(self):
+        body = "\n".join(self._lines).strip()
+        language = self._language or guess_language(body)
+        self._lines = None
+        self._language = None
+        if body and self.parts.get(language) is None:
+            self.parts[language] = body
+            return language
+        return None
+
+    def result(self):
+        return WebsiteParts(self.parts["html"] or "", self.parts["css"] or "", self.parts["js"] or "")
+
+
+def extract_html_document(text):
+    """Fallback for replies without fences: slice out a bare <html> document."""
+    lower = text.lower()
+    start = lower.find("<!doctype")
+    if start == -1:
+        start = lower.find("<html")
+    if start == -1:
+        return ""
+    end = lower.find("</html>", start)
+    return text[start:end + len("</html>") if end != -1 else len(text)].strip()
+
+
+def parse_website_blocks(text):
+    parser = FencedBlockParser()
+    parser.feed(text)
+    parser.close()
+    parts = parser.result()
+    if not parts.html:
+        parts = parts._replace(html=extract_html_document(text))
+    return parts
+
+
+def preview_document(html_code, css_code, js_code):
+    """Assemble the single page used for the live preview."""
+    return "".join((
+        "<html><head><style>", css_code, "</style></head><body>",
+        html_code,
+        "<script>", js_code, "</script></body></html>",
+    ))
+
+
+# --- Minification ---
+# Conservative: comments and indentation go, but whitespace that can change
+# how a page renders or runs (inside <pre>/<textarea>, between inline
+# elements, inside JS strings) is kept. Generated sites lose about a third
+# of their size this way; DEFLATE does the rest.
+HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+HTML_RAW_RE = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE)
+CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+CSS_PUNCTUATION_RE = re.compile(r"\s*([{};,>])\s*")
+LINE_BREAK_RE = re.compile(r"[ \t]*\n\s*")
+
+
+def minify_html(html_code):
+    pieces = HTML_RAW_RE.split(HTML_COMMENT_RE.sub("", html_code))
+    # split() yields text, raw block, tag name, text, ...; only text is squeezed.
+    out = []
+    for i in range(0, len(pieces), 3):
+        out.append(LINE_BREAK_RE.sub("\n", pieces[i]))
+        if i + 1 < len(pieces):
+            out.append(pieces[i + 1])
+    return "".join(out).strip()
+
+
+def minify_css(css_code):
+    css_code = CSS_COMMENT_RE.sub("", css_code)
+    css_code = CSS_PUNCTUATION_RE.sub(r"\1", LINE_BREAK_RE.sub(" ", css_code))
+    return css_code.replace(";}", "}").strip()
+
+
+def minify_js(js_code):
+    """Drop indentation, blank lines and whole-line // comments; statements are untouched."""
+    lines = []
+    for line in js_code.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def minify_parts(html_code, css_code, js_code):
+    return WebsiteParts(minify_html(html_code), minify_css(css_code), minify_js(js_code))